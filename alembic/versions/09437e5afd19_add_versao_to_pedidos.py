@@ -0,0 +1,28 @@
+"""add_versao_to_pedidos
+
+Revision ID: 09437e5afd19
+Revises: 5646aceb322b
+Create Date: 2026-10-18 13:41:09.270315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '09437e5afd19'
+down_revision: Union[str, None] = '5646aceb322b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.add_column(
+        'pedidos',
+        sa.Column('versao', sa.Integer, nullable=False, server_default='1')
+    )
+
+def downgrade():
+    op.drop_column('pedidos', 'versao')
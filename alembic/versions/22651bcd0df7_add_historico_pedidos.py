@@ -0,0 +1,47 @@
+"""add_historico_pedidos
+
+Revision ID: 22651bcd0df7
+Revises: 676bd296f5a4
+Create Date: 2026-10-18 17:05:52.614380
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '22651bcd0df7'
+down_revision: Union[str, None] = '676bd296f5a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        'pedidos_historico',
+        sa.Column('id', sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column('cliente_id', sa.Integer, sa.ForeignKey('clientes.id'), nullable=False),
+        sa.Column('status', sa.Enum('PENDENTE', 'APROVADO', 'RECUSADO', name='status_pedido'), nullable=False),
+        sa.Column('forma_pagamento', sa.Enum('PIX', 'DEBITO', 'CREDITO', name='forma_pagamento'), nullable=False),
+        sa.Column('created_at', sa.DateTime, nullable=True),
+        sa.Column('versao', sa.Integer, nullable=False, server_default='1'),
+        sa.Column('arquivado_em', sa.DateTime, nullable=False),
+    )
+    op.create_index('ix_pedidos_historico_cliente_id', 'pedidos_historico', ['cliente_id'])
+    op.create_index('ix_pedidos_historico_created_at', 'pedidos_historico', ['created_at'])
+
+    op.create_table(
+        'pedido_itens_historico',
+        sa.Column('id', sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column('pedido_id', sa.Integer, sa.ForeignKey('pedidos_historico.id'), nullable=False),
+        sa.Column('produto_id', sa.Integer, sa.ForeignKey('produtos.id'), nullable=False),
+        sa.Column('quantidade', sa.Integer, nullable=False),
+        sa.Column('valor_unitario', sa.Numeric(10, 2), nullable=False),
+    )
+    op.create_index('ix_pedido_itens_historico_pedido_id', 'pedido_itens_historico', ['pedido_id'])
+
+def downgrade():
+    op.drop_table('pedido_itens_historico')
+    op.drop_table('pedidos_historico')
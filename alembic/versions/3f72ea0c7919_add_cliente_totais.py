@@ -0,0 +1,39 @@
+"""add_cliente_totais
+
+Revision ID: 3f72ea0c7919
+Revises: 86a77c73fef5
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f72ea0c7919'
+down_revision: Union[str, None] = '86a77c73fef5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        'cliente_totais',
+        sa.Column('cliente_id', sa.Integer, sa.ForeignKey('clientes.id'), primary_key=True),
+        sa.Column('valor_total', sa.Numeric(12, 2), nullable=False, server_default='0'),
+    )
+    # Preenche com o total atual de cada cliente que já tem pedidos
+    op.execute(
+        """
+        INSERT INTO cliente_totais (cliente_id, valor_total)
+        SELECT p.cliente_id, SUM(i.valor_unitario * i.quantidade)
+        FROM pedidos p
+        JOIN pedido_itens i ON i.pedido_id = p.id
+        GROUP BY p.cliente_id
+        """
+    )
+
+def downgrade():
+    op.drop_table('cliente_totais')
@@ -0,0 +1,30 @@
+"""add_catalogo_versao
+
+Revision ID: 5646aceb322b
+Revises: 5c94f332038e
+Create Date: 2026-10-18 11:20:54.604417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5646aceb322b'
+down_revision: Union[str, None] = '5c94f332038e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        'catalogo_versao',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('versao', sa.Integer, nullable=False, server_default='0'),
+    )
+    op.execute("INSERT INTO catalogo_versao (id, versao) VALUES (1, 1)")
+
+def downgrade():
+    op.drop_table('catalogo_versao')
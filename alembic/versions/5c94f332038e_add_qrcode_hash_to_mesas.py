@@ -0,0 +1,62 @@
+"""add_qrcode_hash_to_mesas
+
+Revision ID: 5c94f332038e
+Revises: 3f72ea0c7919
+Create Date: 2026-10-18 10:03:17.552081
+
+"""
+import base64
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c94f332038e'
+down_revision: Union[str, None] = '3f72ea0c7919'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.add_column('mesas', sa.Column('qrcode_hash', sa.String(64), nullable=True))
+
+    # Backfill: mesma regra de crud.qrcode_hash (SHA-256 do Base64 sem espaços)
+    conn = op.get_bind()
+    mesas = sa.table(
+        'mesas',
+        sa.column('id', sa.Integer),
+        sa.column('qrcode', sa.Text),
+        sa.column('qrcode_hash', sa.String),
+    )
+    linhas = conn.execute(
+        sa.select(mesas.c.id, mesas.c.qrcode).where(mesas.c.qrcode.isnot(None))
+    ).all()
+    atualizacoes = []
+    for mesa_id, qrcode in linhas:
+        if isinstance(qrcode, bytes):
+            try:
+                qrcode = qrcode.decode('utf-8')
+            except UnicodeDecodeError:
+                # PNG cru gravado pelo gerar_qrcode antigo: hash do Base64, que é
+                # o que o /welcome recebe e procura
+                qrcode = base64.b64encode(qrcode).decode('ascii')
+        atualizacoes.append({
+            'b_id': mesa_id,
+            'b_hash': hashlib.sha256(qrcode.strip().encode('utf-8')).hexdigest(),
+        })
+    if atualizacoes:
+        conn.execute(
+            mesas.update()
+            .where(mesas.c.id == sa.bindparam('b_id'))
+            .values(qrcode_hash=sa.bindparam('b_hash')),
+            atualizacoes,
+        )
+
+    op.create_index('ix_mesas_qrcode_hash', 'mesas', ['qrcode_hash'], unique=True)
+
+def downgrade():
+    op.drop_index('ix_mesas_qrcode_hash', table_name='mesas')
+    op.drop_column('mesas', 'qrcode_hash')
@@ -0,0 +1,38 @@
+"""add_mesa_sequencias
+
+Revision ID: 676bd296f5a4
+Revises: 859e21757f7e
+Create Date: 2026-10-18 16:21:35.870142
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '676bd296f5a4'
+down_revision: Union[str, None] = '859e21757f7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    sequencias = op.create_table(
+        'mesa_sequencias',
+        sa.Column('prefixo', sa.String(50), primary_key=True),
+        sa.Column('ultimo', sa.Integer, nullable=False, server_default='0'),
+    )
+    # Último número já usado por prefixo ("MESA-12" -> MESA: 12), comparando
+    # numericamente; identificadores fora do formato PREFIXO-N são ignorados
+    ultimos = {}
+    for (identificador,) in op.get_bind().execute(sa.text("SELECT identificador FROM mesas")):
+        prefixo, _, numero = (identificador or "").rpartition('-')
+        if prefixo and numero.isdigit() and len(prefixo) <= 50:
+            ultimos[prefixo] = max(ultimos.get(prefixo, 0), int(numero))
+    if ultimos:
+        op.bulk_insert(sequencias, [{'prefixo': p, 'ultimo': u} for p, u in ultimos.items()])
+
+def downgrade():
+    op.drop_table('mesa_sequencias')
@@ -0,0 +1,35 @@
+"""add_chaves_idempotencia
+
+Revision ID: 859e21757f7e
+Revises: 873b6ceb0e7c
+Create Date: 2026-10-18 15:40:12.503921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '859e21757f7e'
+down_revision: Union[str, None] = '873b6ceb0e7c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        'chaves_idempotencia',
+        sa.Column('escopo', sa.String(32), primary_key=True),
+        sa.Column('chave', sa.String(255), primary_key=True),
+        sa.Column('impressao', sa.String(64), nullable=False),
+        sa.Column('status_code', sa.Integer, nullable=True),
+        sa.Column('resposta', sa.Text, nullable=True),
+        sa.Column('created_at', sa.DateTime, nullable=False),
+    )
+    op.create_index('ix_chaves_idempotencia_created_at', 'chaves_idempotencia', ['created_at'])
+
+def downgrade():
+    op.drop_index('ix_chaves_idempotencia_created_at', table_name='chaves_idempotencia')
+    op.drop_table('chaves_idempotencia')
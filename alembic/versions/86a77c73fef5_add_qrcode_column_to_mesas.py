@@ -1,7 +1,7 @@
 """add_qrcode_column_to_mesas
 
 Revision ID: 86a77c73fef5
-Revises: 
+Revises: ccbdea27c92a
 Create Date: 2025-06-13 16:32:06.919543
 
 """
@@ -13,7 +13,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision: str = '86a77c73fef5'
-down_revision: Union[str, None] = None
+down_revision: Union[str, None] = 'ccbdea27c92a'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
@@ -0,0 +1,41 @@
+"""add_indices_consultas_quentes
+
+Revision ID: 873b6ceb0e7c
+Revises: 09437e5afd19
+Create Date: 2026-10-18 15:02:47.118406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '873b6ceb0e7c'
+down_revision: Union[str, None] = '09437e5afd19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nome, tabela, colunas, coluna da FK que o índice passa a cobrir)
+INDICES = [
+    ('ix_clientes_mesa_id', 'clientes', ['mesa_id'], 'mesa_id'),
+    ('ix_pedidos_cliente_id_created_at', 'pedidos', ['cliente_id', 'created_at'], 'cliente_id'),
+    ('ix_pedidos_status_id', 'pedidos', ['status', 'id'], None),
+    ('ix_pedidos_created_at', 'pedidos', ['created_at'], None),
+    ('ix_pedido_itens_pedido_id', 'pedido_itens', ['pedido_id'], 'pedido_id'),
+]
+
+
+def upgrade():
+    for nome, tabela, colunas, _ in INDICES:
+        op.create_index(nome, tabela, colunas)
+
+def downgrade():
+    # No MySQL o índice implícito da FK é descartado quando um índice
+    # explícito passa a cobri-la; recria-o antes de remover o nosso.
+    mysql = op.get_bind().dialect.name == 'mysql'
+    for nome, tabela, colunas, coluna_fk in reversed(INDICES):
+        if mysql and coluna_fk:
+            op.create_index(coluna_fk, tabela, [coluna_fk])
+        op.drop_index(nome, table_name=tabela)
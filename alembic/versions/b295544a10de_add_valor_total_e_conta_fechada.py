@@ -0,0 +1,72 @@
+"""add_valor_total_e_conta_fechada
+
+Revision ID: b295544a10de
+Revises: 22651bcd0df7
+Create Date: 2026-10-18 18:12:31.402117
+
+"""
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b295544a10de'
+down_revision: Union[str, None] = '22651bcd0df7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Clientes com atividade mais recente que isso ficam com a conta aberta
+ATIVIDADE_RECENTE = timedelta(hours=12)
+
+# (tabela de pedidos, tabela de itens)
+PEDIDOS = [
+    ('pedidos', 'pedido_itens'),
+    ('pedidos_historico', 'pedido_itens_historico'),
+]
+
+
+def upgrade():
+    for pedidos, itens in PEDIDOS:
+        op.add_column(
+            pedidos,
+            sa.Column('valor_total', sa.Numeric(12, 2), nullable=False, server_default='0')
+        )
+        # Pedidos existentes: total a partir dos itens (preços já congelados)
+        op.execute(
+            f"UPDATE {pedidos} SET valor_total = ("
+            f"SELECT COALESCE(SUM(i.valor_unitario * i.quantidade), 0) "
+            f"FROM {itens} i WHERE i.pedido_id = {pedidos}.id)"
+        )
+
+    op.add_column('clientes', sa.Column('conta_fechada_em', sa.DateTime, nullable=True))
+    # Clientes antigos já foram embora: fecha cada um no horário do último
+    # pedido (ou da chegada, se não pediu nada), senão toda a história da mesa
+    # apareceria em /mesas/{identificador}/conta. Quem chegou ou pediu nas
+    # últimas ATIVIDADE_RECENTE continua com a conta aberta, para que um deploy
+    # durante o serviço não recuse os pedidos de quem está sentado à mesa
+    agora = datetime.utcnow().replace(microsecond=0)
+    op.execute(
+        sa.text(
+            "UPDATE clientes SET conta_fechada_em = COALESCE("
+            "(SELECT MAX(p.created_at) FROM pedidos p WHERE p.cliente_id = clientes.id), "
+            "(SELECT MAX(h.created_at) FROM pedidos_historico h WHERE h.cliente_id = clientes.id), "
+            "clientes.created_at, :agora) "
+            "WHERE (clientes.created_at IS NULL OR clientes.created_at < :corte) "
+            "AND NOT EXISTS (SELECT 1 FROM pedidos p WHERE p.cliente_id = clientes.id AND p.created_at >= :corte) "
+            "AND NOT EXISTS (SELECT 1 FROM pedidos_historico h WHERE h.cliente_id = clientes.id AND h.created_at >= :corte)"
+        ).bindparams(agora=agora, corte=agora - ATIVIDADE_RECENTE)
+    )
+    # O índice composto também cobre a FK de mesa_id
+    op.create_index('ix_clientes_mesa_id_conta_fechada_em', 'clientes', ['mesa_id', 'conta_fechada_em'])
+    op.drop_index('ix_clientes_mesa_id', table_name='clientes')
+
+def downgrade():
+    op.create_index('ix_clientes_mesa_id', 'clientes', ['mesa_id'])
+    op.drop_index('ix_clientes_mesa_id_conta_fechada_em', table_name='clientes')
+    op.drop_column('clientes', 'conta_fechada_em')
+    for pedidos, _ in reversed(PEDIDOS):
+        op.drop_column(pedidos, 'valor_total')
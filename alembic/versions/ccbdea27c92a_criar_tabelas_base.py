@@ -0,0 +1,78 @@
+"""criar_tabelas_base
+
+Revision ID: ccbdea27c92a
+Revises:
+Create Date: 2025-06-13 16:00:00.000000
+
+Tabelas que existiam antes da primeira migração (86a77c73fef5), para que
+`alembic upgrade head` monte sozinho o schema de um banco vazio. Bancos que
+já estão em alguma revisão não executam esta migração.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ccbdea27c92a'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        'mesas',
+        sa.Column('id', sa.Integer, primary_key=True),
+        # O MySQL exige tamanho no VARCHAR ("PREFIXO-N", prefixo de até 50)
+        sa.Column('identificador', sa.String(100), unique=True),
+    )
+
+    op.create_table(
+        'clientes',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('mesa_id', sa.Integer, sa.ForeignKey('mesas.id'), nullable=False),
+        sa.Column('created_at', sa.DateTime, nullable=True),
+    )
+    op.create_index('ix_clientes_id', 'clientes', ['id'])
+
+    op.create_table(
+        'produtos',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('nome', sa.String(100), nullable=False),
+        sa.Column('preco', sa.Numeric(10, 2), nullable=False),
+    )
+    op.create_index('ix_produtos_id', 'produtos', ['id'])
+    op.create_index('ix_produtos_nome', 'produtos', ['nome'])
+
+    # Ids nunca reutilizados no SQLite (ver models.Pedido.__table_args__)
+    op.create_table(
+        'pedidos',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('cliente_id', sa.Integer, sa.ForeignKey('clientes.id'), nullable=False),
+        sa.Column('status', sa.Enum('PENDENTE', 'APROVADO', 'RECUSADO', name='status_pedido'), nullable=False),
+        sa.Column('forma_pagamento', sa.Enum('PIX', 'DEBITO', 'CREDITO', name='forma_pagamento'), nullable=False),
+        sa.Column('created_at', sa.DateTime, nullable=True),
+        sqlite_autoincrement=True,
+    )
+    op.create_index('ix_pedidos_id', 'pedidos', ['id'])
+
+    op.create_table(
+        'pedido_itens',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('pedido_id', sa.Integer, sa.ForeignKey('pedidos.id'), nullable=False),
+        sa.Column('produto_id', sa.Integer, sa.ForeignKey('produtos.id'), nullable=False),
+        sa.Column('quantidade', sa.Integer, nullable=False),
+        sa.Column('valor_unitario', sa.Numeric(10, 2), nullable=False),
+        sqlite_autoincrement=True,
+    )
+    op.create_index('ix_pedido_itens_id', 'pedido_itens', ['id'])
+
+def downgrade():
+    op.drop_table('pedido_itens')
+    op.drop_table('pedidos')
+    op.drop_table('produtos')
+    op.drop_table('clientes')
+    op.drop_table('mesas')
@@ -0,0 +1,112 @@
+"""
+Agrupamento (group commit) da criação de clientes no /welcome.
+
+Na abertura da casa e em eventos, dezenas de clientes leem o QR Code ao mesmo
+tempo e cada leitura criava seu Cliente com um commit próprio. Aqui as
+leituras entram numa fila; uma thread gravadora junta as que chegam dentro de
+WELCOME_AGRUPAMENTO_MS (até WELCOME_AGRUPAMENTO_MAX) e grava todas em uma
+única transação com crud.create_clientes_lote. Cada requisição recebe o id do
+seu próprio cliente por um Future.
+
+Se o lote falhar, cada cliente é gravado individualmente, para que um item
+problemático (ex.: mesa removida) não derrube as demais leituras.
+
+A gravadora usa a sessão síncrona (SessionLocal) também com DB_ASYNC: ela
+roda na própria thread, fora do event loop, e o engine assíncrono pertence
+ao loop das requisições. As requisições só aguardam o Future.
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from . import config, crud
+from .database import SessionLocal
+
+logger = logging.getLogger("bar_api.agrupamento")
+
+_PARAR = object()
+
+
+class AgrupadorClientes:
+    def __init__(self, janela_ms: float, maximo: int):
+        self.janela = janela_ms / 1000
+        self.maximo = maximo
+        self._fila: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _iniciar(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._executar, name="agrupador-clientes", daemon=True
+                )
+                self._thread.start()
+
+    def enviar(self, mesa_id: int) -> Future:
+        """Enfileira a criação de um cliente; o Future recebe o id"""
+        futuro: Future = Future()
+        self._iniciar()
+        self._fila.put((mesa_id, futuro))
+        return futuro
+
+    async def criar(self, mesa_id: int) -> int:
+        return await asyncio.wrap_future(self.enviar(mesa_id))
+
+    def encerrar(self) -> None:
+        """Grava o que já está na fila e para a thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._fila.put(_PARAR)
+            thread.join()
+
+    def _executar(self) -> None:
+        parar = False
+        while not parar:
+            item = self._fila.get()
+            if item is _PARAR:
+                return
+            lote = [item]
+            limite = time.monotonic() + self.janela
+            while len(lote) < self.maximo:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    item = self._fila.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if item is _PARAR:
+                    parar = True
+                    break
+                lote.append(item)
+            self._gravar(lote)
+
+    def _gravar(self, lote: list[tuple[int, Future]]) -> None:
+        db = SessionLocal()
+        try:
+            try:
+                ids = crud.create_clientes_lote(db, [mesa_id for mesa_id, _ in lote])
+            except Exception:
+                db.rollback()
+                if len(lote) == 1:
+                    raise
+                logger.warning("Lote de %d clientes falhou; gravando um a um", len(lote), exc_info=True)
+                for item in lote:
+                    self._gravar([item])
+                return
+            for (_, futuro), cliente_id in zip(lote, ids):
+                futuro.set_result(cliente_id)
+        except Exception as e:
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+        finally:
+            db.close()
+
+
+clientes = AgrupadorClientes(config.WELCOME_AGRUPAMENTO_MS, config.WELCOME_AGRUPAMENTO_MAX)
@@ -0,0 +1,130 @@
+"""
+Arquivamento de pedidos antigos: tabelas quentes pequenas para a operação.
+
+Pedidos criados antes do horizonte saem de pedidos/pedido_itens e vão, com
+os mesmos ids, para pedidos_historico e pedido_itens_historico. Cada lote
+(ARQUIVAMENTO_LOTE pedidos) é copiado e removido em uma transação curta,
+então o processo pode rodar com a casa aberta e ser interrompido a qualquer
+momento sem perder nem duplicar pedidos.
+
+Pedidos ainda PENDENTE depois do horizonte são tratados como abandonados e
+arquivados com o status que têm: antes de PATCH /pedidos/status não havia
+como mudar o status, então todo pedido antigo ficou PENDENTE. Com
+--contas-fechadas, os pedidos finalizados (APROVADO/RECUSADO) de clientes
+cuja conta já foi fechada (POST /mesas/{identificador}/conta/fechar) também
+são arquivados, qualquer que seja a idade.
+
+Como o arquivo guarda os ids originais, eles não podem voltar a ser usados.
+O pedido de maior id e o pedido dono do item de maior id nunca são
+arquivados: o MySQL antes da 8.0 (após reiniciar) e o SQLite sem
+AUTOINCREMENT retomam a sequência a partir do maior id da tabela.
+
+Os totais por cliente (/clientes-mesas-valor-total/, python -m app.totais)
+somam as duas tabelas; o arquivo é consultado em GET /pedidos/historico.
+
+Uso:
+    python -m app.arquivamento                # horizonte de ARQUIVAMENTO_DIAS
+    python -m app.arquivamento --dias 30 --lote 5000
+    python -m app.arquivamento --contas-fechadas
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, func, insert, literal, or_, select
+from sqlalchemy.orm import Session
+
+from app import config, models
+from app.database import SessionLocal
+
+# Status que não mudam mais (ver models.TransicoesStatusPedido)
+STATUS_FINAIS = tuple(s for s in models.StatusPedidoEnum if s not in models.TransicoesStatusPedido)
+
+
+def _arquivar_lote(db: Session, ids: list[int], agora: datetime) -> None:
+    pedido, item = models.Pedido, models.PedidoItem
+    db.execute(
+        insert(models.PedidoHistorico).from_select(
+            ["id", "cliente_id", "status", "forma_pagamento", "created_at", "versao", "valor_total", "arquivado_em"],
+            select(
+                pedido.id, pedido.cliente_id, pedido.status, pedido.forma_pagamento, pedido.created_at,
+                pedido.versao, pedido.valor_total, literal(agora, models.PedidoHistorico.arquivado_em.type)
+            ).where(pedido.id.in_(ids))
+        )
+    )
+    db.execute(
+        insert(models.PedidoItemHistorico).from_select(
+            ["id", "pedido_id", "produto_id", "quantidade", "valor_unitario"],
+            select(item.id, item.pedido_id, item.produto_id, item.quantidade, item.valor_unitario)
+            .where(item.pedido_id.in_(ids))
+        )
+    )
+    db.execute(delete(item).where(item.pedido_id.in_(ids)))
+    db.execute(delete(pedido).where(pedido.id.in_(ids)))
+
+
+def arquivar_pedidos(
+    db: Session,
+    antes_de: datetime,
+    tamanho_lote: int = config.ARQUIVAMENTO_LOTE,
+    contas_fechadas: bool = False
+) -> int:
+    """
+    Arquiva os pedidos criados antes de `antes_de` (e, com `contas_fechadas`,
+    os finalizados de clientes com a conta fechada); retorna quantos
+    """
+    pedido, item = models.Pedido, models.PedidoItem
+    # Mantém nas tabelas quentes as linhas que seguram o maior id de cada uma
+    ultimo_pedido = db.execute(select(func.max(pedido.id))).scalar()
+    pedido_do_ultimo_item = db.execute(
+        select(item.pedido_id).where(item.id == select(func.max(item.id)).scalar_subquery())
+    ).scalar()
+    if ultimo_pedido is None:
+        return 0
+
+    query = select(pedido.id).where(pedido.id < ultimo_pedido)
+    if pedido_do_ultimo_item is not None:
+        query = query.where(pedido.id != pedido_do_ultimo_item)
+    if contas_fechadas:
+        query = query.join(models.Cliente, pedido.cliente_id == models.Cliente.id).where(
+            or_(
+                pedido.created_at < antes_de,
+                and_(pedido.status.in_(STATUS_FINAIS), models.Cliente.conta_fechada_em.isnot(None))
+            )
+        )
+    else:
+        query = query.where(pedido.created_at < antes_de)
+
+    total = 0
+    while True:
+        ids = list(db.execute(query.order_by(pedido.id).limit(tamanho_lote)).scalars())
+        if not ids:
+            return total
+        _arquivar_lote(db, ids, datetime.utcnow())
+        db.commit()
+        total += len(ids)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Arquivamento de pedidos antigos")
+    parser.add_argument("--dias", type=int, default=config.ARQUIVAMENTO_DIAS, help="horizonte em dias")
+    parser.add_argument("--lote", type=int, default=config.ARQUIVAMENTO_LOTE, help="pedidos por transação")
+    parser.add_argument(
+        "--contas-fechadas", action="store_true",
+        help="arquiva também os pedidos finalizados de contas já fechadas"
+    )
+    args = parser.parse_args(argv)
+
+    antes_de = datetime.utcnow() - timedelta(days=args.dias)
+    db = SessionLocal()
+    try:
+        arquivados = arquivar_pedidos(db, antes_de, args.lote, args.contas_fechadas)
+        sufixo = " ou de contas fechadas" if args.contas_fechadas else ""
+        print(f"✅ {arquivados} pedidos anteriores a {antes_de:%Y-%m-%d %H:%M}{sufixo} arquivados")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
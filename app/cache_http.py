@@ -0,0 +1,21 @@
+import hashlib
+
+
+def etag_de(conteudo: bytes) -> str:
+    """ETag forte derivada do hash do conteúdo"""
+    return f'"{hashlib.sha256(conteudo).hexdigest()[:32]}"'
+
+
+def etag_confere(if_none_match: str | None, etag: str) -> bool:
+    """Verifica o cabeçalho If-None-Match (lista separada por vírgulas, W/ ou *)"""
+    if not if_none_match:
+        return False
+    for candidata in if_none_match.split(","):
+        candidata = candidata.strip()
+        if candidata == "*":
+            return True
+        if candidata.startswith("W/"):
+            candidata = candidata[2:]
+        if candidata == etag:
+            return True
+    return False
@@ -0,0 +1,70 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from . import config, crud, schemas
+
+
+_produtos_adapter = TypeAdapter(List[schemas.ProdutoBase])
+
+
+@dataclass(frozen=True)
+class Catalogo:
+    versao: int
+    produtos: List[schemas.ProdutoBase]
+    json: bytes  # Cardápio já serializado, pronto para a resposta
+
+    @property
+    def etag(self) -> str:
+        return f'"catalogo-{self.versao}"'
+
+
+class CacheCatalogo:
+    """
+    Cardápio em memória, invalidado pelo contador de versão do banco.
+
+    Cada worker guarda sua cópia; a cada `intervalo` segundos (no máximo)
+    confere `catalogo_versao` no banco — uma leitura de uma linha — e só
+    recarrega os produtos se outro worker alterou o cardápio.
+    """
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self._atual: Catalogo | None = None
+        self._verificado_em = 0.0
+        self._lock = threading.Lock()
+
+    def obter(self, db: Session) -> Catalogo:
+        atual = self._atual
+        if atual is not None and time.monotonic() - self._verificado_em < self.intervalo:
+            return atual
+
+        # Nenhuma consulta é feita com o lock: em modo assíncrono (run_sync) a
+        # espera pelo banco devolve o controle ao event loop, na mesma thread
+        versao = crud.get_versao_catalogo(db)
+        if atual is None or atual.versao != versao:
+            produtos = _produtos_adapter.validate_python(
+                crud.get_produtos(db), from_attributes=True
+            )
+            atual = Catalogo(
+                versao=versao,
+                produtos=produtos,
+                json=_produtos_adapter.dump_json(produtos)
+            )
+
+        with self._lock:
+            if self._atual is None or self._atual.versao <= atual.versao:
+                self._atual = atual
+            self._verificado_em = time.monotonic()
+        return atual
+
+    def invalidar(self) -> None:
+        with self._lock:
+            self._atual = None
+
+
+cache = CacheCatalogo(config.CATALOGO_INTERVALO_VERIFICACAO)
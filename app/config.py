@@ -0,0 +1,60 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_bool(nome: str, padrao: bool = False) -> bool:
+    valor = os.getenv(nome)
+    if valor is None:
+        return padrao
+    return valor.strip().lower() in ("1", "true", "sim", "yes", "on")
+
+
+# Modo assíncrono: endpoints quentes usam AsyncSession (ver app/crud_async.py)
+DB_ASYNC = _env_bool("DB_ASYNC")
+
+# Pool de conexões (app/database.py)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Abaixo do wait_timeout do MySQL compartilhado, que derruba conexões ociosas
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "280"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+# Conexões abertas na subida do app, antes da primeira requisição (0 desativa)
+DB_POOL_AQUECER = int(os.getenv("DB_POOL_AQUECER", str(DB_POOL_SIZE)))
+
+# Mantém a tabela cliente_totais atualizada a cada pedido e usa ela
+# em /clientes-mesas-valor-total/ (ver `python -m app.totais`)
+TOTAIS_MATERIALIZADOS = _env_bool("TOTAIS_MATERIALIZADOS")
+
+# Processos usados para renderizar QR Codes em lote (POST /mesas/lote/)
+QRCODE_WORKERS = int(os.getenv("QRCODE_WORKERS", os.cpu_count() or 1))
+
+# Cache dos PNGs servidos em /mesas/{identificador}/qrcode
+QRCODE_CACHE_TAMANHO = int(os.getenv("QRCODE_CACHE_TAMANHO", "1024"))
+QRCODE_CACHE_DIR = os.getenv("QRCODE_CACHE_DIR") or None
+
+# Segundos entre verificações da versão do cardápio no banco (0 = toda requisição)
+CATALOGO_INTERVALO_VERIFICACAO = float(os.getenv("CATALOGO_INTERVALO_VERIFICACAO", "1"))
+
+# Métricas: consultas acima deste tempo são logadas como lentas
+METRICAS_SQL_LENTO_MS = float(os.getenv("METRICAS_SQL_LENTO_MS", "200"))
+# Alerta de N+1 quando a mesma consulta se repete mais vezes que isto em
+# uma requisição (0 desativa)
+METRICAS_N_MAIS_1_LIMIAR = int(os.getenv("METRICAS_N_MAIS_1_LIMIAR", "10"))
+
+# Idempotency-Key em POST /pedidos/ e POST /welcome: por quanto tempo uma
+# resposta pode ser repetida e quantas ficam no cache em memória do worker
+IDEMPOTENCIA_TTL_S = int(os.getenv("IDEMPOTENCIA_TTL_S", str(24 * 3600)))
+IDEMPOTENCIA_CACHE_TAMANHO = int(os.getenv("IDEMPOTENCIA_CACHE_TAMANHO", "10000"))
+
+# /welcome: clientes criados por leituras simultâneas de QR Code dentro desta
+# janela são gravados em uma única transação (0 = um commit por leitura)
+WELCOME_AGRUPAMENTO_MS = float(os.getenv("WELCOME_AGRUPAMENTO_MS", "5"))
+WELCOME_AGRUPAMENTO_MAX = int(os.getenv("WELCOME_AGRUPAMENTO_MAX", "200"))
+
+# Arquivamento (python -m app.arquivamento): pedidos (inclusive PENDENTE abandonados) mais antigos
+# que isto saem das tabelas quentes para pedidos_historico/pedido_itens_historico
+ARQUIVAMENTO_DIAS = int(os.getenv("ARQUIVAMENTO_DIAS", "90"))
+ARQUIVAMENTO_LOTE = int(os.getenv("ARQUIVAMENTO_LOTE", "1000"))
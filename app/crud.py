@@ -1,28 +1,48 @@
-from io import BytesIO
 from fastapi import HTTPException
-import qrcode
-from sqlalchemy.orm import Session
-from . import models, schemas
+from sqlalchemy import and_, func, insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only
+from . import config, eventos, models, schemas
+from .qrcodes import decodificar_base64, gerar_lote_base64, generate_qrcode_base64, qrcode_hash
 from datetime import datetime
+from decimal import Decimal
+import json
 import random
 import string
-from typing import List
-import base64
-from io import BytesIO
+from typing import Iterator, List
 
 
 
 
-# -------- MESAS --------
+# -------- INSERT EM LOTE --------
+
+def _inserir_em_lote(db: Session, model, linhas: list[dict]) -> list[int]:
+    """
+    INSERT de várias linhas de `model` com um comando por lote
+    (INSERT ... VALUES (...), (...) RETURNING id, o insertmanyvalues do
+    SQLAlchemy); retorna os ids na ordem de `linhas`.
+
+    No SQLite, sort_by_parameter_order faria o SQLAlchemy voltar a um INSERT
+    por linha (não há sentinela implícita para o rowid). Lá os rowids são
+    dados na ordem do VALUES, com a trava de escrita do banco, então basta
+    ordenar os ids devolvidos. Sem RETURNING (MySQL) é um INSERT por linha.
+    """
+    dialeto = db.get_bind().dialect
+    tabela = model.__table__
+    if dialeto.name == "sqlite":
+        return sorted(db.execute(insert(tabela).returning(tabela.c.id), linhas).scalars())
+    if dialeto.insert_executemany_returning_sort_by_parameter_order:
+        return list(db.execute(
+            insert(tabela).returning(tabela.c.id, sort_by_parameter_order=True), linhas
+        ).scalars())
+    return [db.execute(insert(tabela).values(**linha)).inserted_primary_key[0] for linha in linhas]
+
+
+
 
-def generate_qrcode_base64(identificador: str) -> str:
-    """Gera QR Code como string Base64"""
-    url = f"https://seuapp.com/welcome/{identificador}"
-    img = qrcode.make(url)
-    buf = BytesIO()
-    img.save(buf, format="PNG")
-    return base64.b64encode(buf.getvalue()).decode('utf-8')
+# -------- MESAS --------
 
+TAMANHO_LOTE_INSERT = 500
 
 '''
 def create_mesa(db: Session, mesa: schemas.MesaCreate):
@@ -39,35 +59,90 @@ def create_mesa(db: Session, mesa: schemas.MesaCreate):
 '''
 
 
-def create_mesas_lote(db: Session, quantidade: int, prefixo: str = "MESA") -> List[models.Mesa]:
-    mesas_criadas = []
-    ultimo_numero = 0
-    
-    # Encontra o último número usado
-    ultima_mesa = db.query(models.Mesa).filter(
-        models.Mesa.identificador.startswith(f"{prefixo}-")
-    ).order_by(models.Mesa.identificador.desc()).first()
-    
-    if ultima_mesa:
+def _maior_numero_mesa(db: Session, prefixo: str) -> int:
+    """Maior N entre as mesas "{prefixo}-N" (comparação numérica, não de texto)"""
+    maior = 0
+    for (identificador,) in db.query(models.Mesa.identificador).filter(
+        models.Mesa.identificador.startswith(f"{prefixo}-", autoescape=True)
+    ):
+        sufixo = identificador[len(prefixo) + 1:]
+        if sufixo.isdigit():
+            maior = max(maior, int(sufixo))
+    return maior
+
+
+def reservar_numeros_mesa(db: Session, prefixo: str, quantidade: int) -> int:
+    """
+    Reserva `quantidade` números consecutivos para o prefixo e retorna o primeiro.
+
+    Um único UPDATE atômico em mesa_sequencias (ultimo = ultimo + quantidade)
+    reserva o bloco: dois lotes simultâneos nunca recebem o mesmo número e o
+    custo não depende de quantas mesas já existem. A reserva é confirmada na
+    hora, para não segurar o lock da linha enquanto os QR Codes são gerados;
+    um lote que falhe depois disso apenas deixa um buraco na numeração.
+    """
+    sequencia = models.MesaSequencia.__table__
+    for _ in range(2):
+        resultado = db.execute(
+            update(sequencia)
+            .where(sequencia.c.prefixo == prefixo)
+            .values(ultimo=sequencia.c.ultimo + quantidade)
+        )
+        if resultado.rowcount:
+            # A linha fica bloqueada por esta transação até o commit
+            ultimo = db.execute(
+                select(sequencia.c.ultimo).where(sequencia.c.prefixo == prefixo)
+            ).scalar_one()
+            db.commit()
+            return ultimo - quantidade + 1
+
+        # Primeiro lote deste prefixo: parte das mesas que já existirem
         try:
-            ultimo_numero = int(ultima_mesa.identificador.split("-")[1])
-        except (IndexError, ValueError):
-            pass
-    
+            with db.begin_nested():
+                db.execute(insert(sequencia).values(
+                    prefixo=prefixo, ultimo=_maior_numero_mesa(db, prefixo)
+                ))
+        except IntegrityError:
+            pass  # outro lote criou a linha ao mesmo tempo; o UPDATE resolve
 
+    raise RuntimeError(f"Não foi possível reservar números para o prefixo '{prefixo}'")
 
-    # Cria as mesas em lote
-    for i in range(1, quantidade + 1):
-        identificador = f"{prefixo}-{ultimo_numero + i}"
-        qrcode_base64 = generate_qrcode_base64(identificador)
-        
-        nova_mesa = models.Mesa(
-            identificador=identificador,
-            qrcode=qrcode_base64
+
+def create_mesas_lote(db: Session, quantidade: int, prefixo: str = "MESA") -> List[dict]:
+    primeiro = reservar_numeros_mesa(db, prefixo, quantidade)
+    identificadores = [f"{prefixo}-{primeiro + i}" for i in range(quantidade)]
+
+    # Renderiza os QR Codes em paralelo (processos) antes de abrir a escrita
+    qrcodes = gerar_lote_base64(identificadores)
+
+    # Insere em lotes (executemany) e busca os ids gerados com uma consulta por lote
+    mesas_criadas = []
+    for inicio in range(0, len(identificadores), TAMANHO_LOTE_INSERT):
+        lote = [
+            {
+                "identificador": identificador,
+                "qrcode": qrcode_base64,
+                "qrcode_hash": qrcode_hash(qrcode_base64)
+            }
+            for identificador, qrcode_base64 in zip(
+                identificadores[inicio:inicio + TAMANHO_LOTE_INSERT],
+                qrcodes[inicio:inicio + TAMANHO_LOTE_INSERT]
+            )
+        ]
+        db.execute(insert(models.Mesa), lote)
+
+        ids = dict(
+            db.query(models.Mesa.identificador, models.Mesa.id)
+            .filter(models.Mesa.identificador.in_([m["identificador"] for m in lote]))
+            .all()
         )
-        db.add(nova_mesa)
-        mesas_criadas.append(nova_mesa)
-    
+        for mesa in lote:
+            mesas_criadas.append({
+                "id": ids[mesa["identificador"]],
+                "identificador": mesa["identificador"],
+                "qrcode": mesa["qrcode"]
+            })
+
     db.commit()
     return mesas_criadas
 
@@ -76,6 +151,24 @@ def create_mesas_lote(db: Session, quantidade: int, prefixo: str = "MESA") -> Li
 def get_mesas(db: Session) -> List[models.Mesa]:
     return db.query(models.Mesa).all()
 
+# Campos que GET /mesas/ e o lookup por identificador aceitam em `fields=`
+CAMPOS_MESA = ("id", "identificador", "qrcode")
+
+
+def get_mesas_linhas(db: Session, campos: tuple[str, ...] = CAMPOS_MESA) -> list[dict]:
+    """Mesas como dicts só com `campos`, direto das tuplas (só lê qrcode se pedido)"""
+    colunas = [getattr(models.Mesa, campo) for campo in campos]
+    return [dict(zip(campos, linha)) for linha in db.execute(select(*colunas))]
+
+def get_mesa_linha(db: Session, identificador: str, campos: tuple[str, ...] = CAMPOS_MESA) -> dict:
+    colunas = [getattr(models.Mesa, campo) for campo in campos]
+    linha = db.execute(
+        select(*colunas).where(models.Mesa.identificador == identificador)
+    ).first()
+    if linha is None:
+        raise ValueError(f"Mesa com identificador '{identificador}' não encontrada")
+    return dict(zip(campos, linha))
+
 def get_mesa_by_identificador(db: Session, identificador: str) -> models.Mesa:
     mesa = db.query(models.Mesa).filter(
         models.Mesa.identificador == identificador
@@ -91,6 +184,117 @@ def get_mesa_by_identificador(db: Session, identificador: str) -> models.Mesa |
     return db.query(models.Mesa).filter(models.Mesa.identificador == identificador).first()
 
 
+def get_qrcode_png(db: Session, identificador: str) -> bytes | None:
+    """
+    PNG do QR Code da mesa, ou None se a mesa não existe.
+
+    Se a mesa ainda não tem QR Code (ou o armazenado é inválido), gera,
+    salva como Base64 e retorna.
+    """
+    mesa = db.query(models.Mesa).options(
+        load_only(models.Mesa.id, models.Mesa.qrcode)
+    ).filter(models.Mesa.identificador == identificador).first()
+    if not mesa:
+        return None
+
+    png = decodificar_base64(mesa.qrcode)
+    if png is None:
+        qrcode_base64 = generate_qrcode_base64(identificador)
+        mesa.qrcode = qrcode_base64
+        mesa.qrcode_hash = qrcode_hash(qrcode_base64)
+        db.commit()
+        png = decodificar_base64(qrcode_base64)
+    return png
+
+
+_COLUNAS_QRCODE = (models.Mesa.id, models.Mesa.identificador, models.Mesa.qrcode)
+
+
+def _lotes_mesas(db: Session, prefixo: str | None, tamanho_lote: int):
+    """Todas as mesas (ou as do prefixo), por id, em lotes (paginação por keyset)"""
+    query = select(*_COLUNAS_QRCODE)
+    if prefixo:
+        query = query.where(models.Mesa.identificador.startswith(f"{prefixo}-", autoescape=True))
+
+    apos_id = 0
+    while True:
+        linhas = db.execute(
+            query.where(models.Mesa.id > apos_id).order_by(models.Mesa.id).limit(tamanho_lote)
+        ).all()
+        if not linhas:
+            return
+        apos_id = linhas[-1].id
+        yield linhas
+
+
+def _lotes_mesas_faixa(db: Session, prefixo: str, de: int | None, ate: int | None, tamanho_lote: int):
+    """
+    Mesas "{prefixo}-N" com de <= N <= ate, buscadas pelo identificador
+    (índice único) em lotes de IN; os QR Codes das demais mesas do prefixo
+    não são lidos. Sem `ate`, vai até o último número reservado do prefixo.
+    """
+    ultimo = db.execute(
+        select(models.MesaSequencia.ultimo).where(models.MesaSequencia.prefixo == prefixo)
+    ).scalar()
+    if ultimo is None:
+        ultimo = _maior_numero_mesa(db, prefixo)
+    numeros = range(de if de is not None else 1, min(ate, ultimo) + 1 if ate is not None else ultimo + 1)
+
+    for inicio in range(0, len(numeros), tamanho_lote):
+        identificadores = [f"{prefixo}-{n}" for n in numeros[inicio:inicio + tamanho_lote]]
+        linhas = db.execute(
+            select(*_COLUNAS_QRCODE)
+            .where(models.Mesa.identificador.in_(identificadores))
+            .order_by(models.Mesa.id)
+        ).all()
+        if linhas:
+            yield linhas
+
+
+def iter_qrcodes_mesas(
+    db: Session,
+    prefixo: str | None = None,
+    de: int | None = None,
+    ate: int | None = None,
+    tamanho_lote: int = 100
+) -> Iterator[list[tuple[str, bytes]]]:
+    """
+    Percorre as mesas (por id, em lotes) e produz (identificador, PNG).
+
+    Com `prefixo`, só as mesas "{prefixo}-N", opcionalmente com de <= N <= ate.
+    Usa o QR Code já armazenado; os que faltam (ou são inválidos) em cada lote
+    são gerados em paralelo (gerar_lote_base64) e salvos, como em get_qrcode_png.
+    """
+    if prefixo and (de is not None or ate is not None):
+        lotes = _lotes_mesas_faixa(db, prefixo, de, ate, tamanho_lote)
+    else:
+        lotes = _lotes_mesas(db, prefixo, tamanho_lote)
+
+    for linhas in lotes:
+        pngs = {linha.id: decodificar_base64(linha.qrcode) for linha in linhas}
+        faltando = [linha for linha in linhas if pngs[linha.id] is None]
+        if faltando:
+            novos = gerar_lote_base64([linha.identificador for linha in faltando])
+            db.execute(update(models.Mesa), [
+                {"id": linha.id, "qrcode": qrcode_base64, "qrcode_hash": qrcode_hash(qrcode_base64)}
+                for linha, qrcode_base64 in zip(faltando, novos)
+            ])
+            db.commit()
+            for linha, qrcode_base64 in zip(faltando, novos):
+                pngs[linha.id] = decodificar_base64(qrcode_base64)
+
+        yield [(linha.identificador, pngs[linha.id]) for linha in linhas]
+
+
+def get_mesa_by_qrcode(db: Session, qrcode_base64: str) -> models.Mesa | None:
+    """Busca pelo hash indexado em vez de comparar a imagem inteira"""
+    return db.query(models.Mesa).options(
+        load_only(models.Mesa.id, models.Mesa.identificador)
+    ).filter(
+        models.Mesa.qrcode_hash == qrcode_hash(qrcode_base64)
+    ).first()
+
+
 
 
 
@@ -104,38 +308,117 @@ def create_cliente(db: Session, mesa_identificador: str) -> models.Cliente:
 
     cliente = models.Cliente(mesa_id=mesa.id)
     db.add(cliente)
+    if config.TOTAIS_MATERIALIZADOS:
+        db.flush()
+        db.add(models.ClienteTotal(cliente_id=cliente.id, valor_total=0))
     db.commit()
     db.refresh(cliente)
     return cliente
 
 
+def create_clientes_lote(db: Session, mesa_ids: list[int]) -> list[int]:
+    """
+    Cria um cliente por mesa_id (repetições permitidas) em uma única transação.
+
+    Retorna os ids na mesma ordem de `mesa_ids`. Usado pelo agrupamento do
+    /welcome (app/agrupamento.py): um INSERT em lote e um commit para várias
+    leituras de QR Code.
+    """
+    ids = _inserir_em_lote(db, models.Cliente, [{"mesa_id": mesa_id} for mesa_id in mesa_ids])
+    if config.TOTAIS_MATERIALIZADOS:
+        db.execute(insert(models.ClienteTotal), [{"cliente_id": id_, "valor_total": 0} for id_ in ids])
+    db.commit()
+    return ids
+
+
 
 
 
 # -------- PRODUTOS --------
 
+CENTAVOS = Decimal("0.01")  # Escala de Produto.preco (Numeric(10, 2))
+
 def get_produtos(db: Session) -> list[models.Produto]:
     return db.query(models.Produto).all()
 
 def get_produto(db: Session, produto_id: int) -> models.Produto | None:
     return db.query(models.Produto).filter(models.Produto.id == produto_id).first()
 
-def create_produtos(db: Session, produtos: list[schemas.ProdutoCreate]) -> list[models.Produto]:
-    produtos_criados = []
-    for produto in produtos:
-        novo_produto = models.Produto(
-            nome=produto.nome,
-            preco=produto.preco
+def get_versao_catalogo(db: Session) -> int:
+    versao = db.query(models.CatalogoVersao.versao).filter(models.CatalogoVersao.id == 1).scalar()
+    return versao or 0
+
+def incrementar_versao_catalogo(db: Session) -> None:
+    """Deve ser chamada na mesma transação de qualquer alteração em produtos"""
+    atualizados = (
+        db.query(models.CatalogoVersao)
+        .filter(models.CatalogoVersao.id == 1)
+        .update(
+            {models.CatalogoVersao.versao: models.CatalogoVersao.versao + 1},
+            synchronize_session=False
         )
-        db.add(novo_produto)
-        produtos_criados.append(novo_produto)
-
+    )
+    if not atualizados:
+        db.add(models.CatalogoVersao(id=1, versao=1))
+
+def create_produtos(db: Session, produtos: list[schemas.ProdutoCreate]) -> list[dict]:
+    # Um INSERT em lote; os ids voltam na ordem dos produtos, sem reler do banco
+    ids = _inserir_em_lote(db, models.Produto, [
+        {"nome": produto.nome, "preco": produto.preco} for produto in produtos
+    ])
+
+    resposta = [
+        {"id": id_, "nome": produto.nome, "preco": produto.preco.quantize(CENTAVOS)}
+        for id_, produto in zip(ids, produtos)
+    ]
+    incrementar_versao_catalogo(db)
     db.commit()
+    return resposta
+
+
+def importar_produtos_lote(
+    db: Session,
+    produtos: list[schemas.ProdutoCreate],
+    atualizar_existentes: bool = True
+) -> tuple[int, int]:
+    """
+    Grava um lote da importação na transação corrente (sem commit).
+
+    Com `atualizar_existentes`, produtos cujo nome já existe têm o preço
+    atualizado (upsert por nome); os demais são inseridos. Tudo com
+    executemany: uma consulta + até dois comandos por lote.
+    Retorna (criados, atualizados).
+    """
+    # Nomes repetidos no mesmo lote: vale a última linha
+    por_nome = {produto.nome: produto for produto in produtos}
+
+    atualizacoes = []
+    if atualizar_existentes:
+        existentes = (
+            db.query(models.Produto.id, models.Produto.nome)
+            .filter(models.Produto.nome.in_(por_nome.keys()))
+            .all()
+        )
+        for produto_id, nome in existentes:
+            atualizacoes.append({"id": produto_id, "preco": por_nome[nome].preco})
+        nomes_existentes = {nome for _, nome in existentes}
+        novos = [p for nome, p in por_nome.items() if nome not in nomes_existentes]
+    else:
+        novos = produtos
+
+    if atualizacoes:
+        db.execute(update(models.Produto), atualizacoes)
+    if novos:
+        db.execute(
+            insert(models.Produto),
+            [{"nome": p.nome, "preco": p.preco} for p in novos]
+        )
+    return len(novos), len(atualizacoes)
 
-    for produto in produtos_criados:
-        db.refresh(produto)
 
-    return produtos_criados
+def concluir_importacao_produtos(db: Session) -> None:
+    incrementar_versao_catalogo(db)
+    db.commit()
 
 
 
@@ -143,103 +426,700 @@ def create_produtos(db: Session, produtos: list[schemas.ProdutoCreate]) -> list[
 
 # -------- PEDIDOS --------
 
-def create_pedido(db: Session, pedido: schemas.PedidoCreate) -> models.Pedido:
-    db_pedido = models.Pedido(
-        cliente_id=pedido.cliente_id,
-        forma_pagamento=pedido.forma_pagamento.upper(),
-        status="PENDENTE",
-        created_at=datetime.utcnow()
-    )
-    db.add(db_pedido)
-    db.flush()  # Garante que o ID do pedido é gerado antes de criar os itens
+def get_produtos_por_ids(db: Session, produto_ids) -> dict[int, models.Produto]:
+    """Resolve vários produtos com uma única consulta IN"""
+    ids = set(produto_ids)
+    if not ids:
+        return {}
+    return {
+        produto.id: produto
+        for produto in db.query(models.Produto).filter(models.Produto.id.in_(ids))
+    }
+
+
+def get_mesas_por_clientes(db: Session, cliente_ids) -> tuple[dict[int, str], set[int]]:
+    """
+    Mapa cliente_id -> identificador da mesa dos clientes com a conta aberta e
+    o conjunto dos clientes com a conta já fechada, com uma única consulta.
+    Clientes que não existem não aparecem em nenhum dos dois.
+    """
+    ids = set(cliente_ids)
+    if not ids:
+        return {}, set()
+    mesas_por_cliente = {}
+    contas_fechadas = set()
+    for cliente_id, identificador, fechada_em in (
+        db.query(models.Cliente.id, models.Mesa.identificador, models.Cliente.conta_fechada_em)
+        .join(models.Mesa, models.Cliente.mesa_id == models.Mesa.id)
+        .filter(models.Cliente.id.in_(ids))
+    ):
+        if fechada_em is None:
+            mesas_por_cliente[cliente_id] = identificador
+        else:
+            contas_fechadas.add(cliente_id)
+    return mesas_por_cliente, contas_fechadas
+
+
+def _erro_conta_fechada(cliente_id: int) -> tuple[int, str]:
+    return 409, f"A conta do cliente {cliente_id} foi fechada"
+
+
+def _validar_pedido(
+    pedido: schemas.PedidoCreate,
+    mesas_por_cliente: dict[int, str],
+    contas_fechadas: set[int],
+    produtos: dict[int, models.Produto]
+) -> tuple[int, str] | None:
+    """Retorna (status_code, mensagem) se o pedido for inválido"""
+    if pedido.forma_pagamento.upper() not in models.FormaPagamentoEnum:
+        return 422, f"Forma de pagamento inválida: {pedido.forma_pagamento}"
+    if pedido.cliente_id in contas_fechadas:
+        return _erro_conta_fechada(pedido.cliente_id)
+    if pedido.cliente_id not in mesas_por_cliente:
+        return 404, f"Cliente com ID {pedido.cliente_id} não encontrado"
+    faltando = sorted({item.produto_id for item in pedido.itens} - produtos.keys())
+    if faltando:
+        return 404, f"Produtos com ID {faltando} não encontrados"
+    return None
+
+
+def _inserir_pedidos(
+    db: Session,
+    pedidos: list[schemas.PedidoCreate],
+    produtos: dict[int, models.Produto],
+    mesas_por_cliente: dict[int, str]
+) -> list[dict]:
+    """
+    Insere pedidos já validados e seus itens na transação corrente.
+
+    Pedidos e itens vão cada um em um único INSERT em lote e os preços são
+    congelados a partir de `produtos`, já resolvidos pelo chamador. O total de
+    cada pedido é calculado aqui, uma vez, e gravado em Pedido.valor_total.
+    Retorna os pedidos no formato de PedidoResponse, sem reler do banco.
+    """
+    agora = datetime.utcnow()
+    linhas = [
+        {
+            "cliente_id": pedido.cliente_id,
+            "forma_pagamento": pedido.forma_pagamento.upper(),
+            "status": "PENDENTE",
+            "created_at": agora,
+            "versao": 1,
+            "valor_total": sum(
+                (produtos[item.produto_id].preco * item.quantidade for item in pedido.itens),
+                Decimal("0")
+            ),
+        }
+        for pedido in pedidos
+    ]
+    ids = _inserir_em_lote(db, models.Pedido, linhas)
 
     itens = []
-    for item in pedido.itens:
-        produto = get_produto(db, item.produto_id)
-        if not produto:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Produto com ID {item.produto_id} não encontrado"
-            )
+    respostas = []
+    for pedido, linha, pedido_id in zip(pedidos, linhas, ids):
+        resposta_itens = []
+        for item in pedido.itens:
+            produto = produtos[item.produto_id]
+            itens.append({
+                "pedido_id": pedido_id,
+                "produto_id": produto.id,
+                "quantidade": item.quantidade,
+                "valor_unitario": produto.preco
+            })
+            resposta_itens.append({
+                "produto": {"id": produto.id, "nome": produto.nome, "preco": produto.preco},
+                "quantidade": item.quantidade,
+                "valor_unitario": produto.preco
+            })
+
+        if config.TOTAIS_MATERIALIZADOS:
+            _somar_total_cliente(db, pedido.cliente_id, linha["valor_total"])
+
+        respostas.append({
+            "id": pedido_id,
+            "cliente_id": linha["cliente_id"],
+            "mesa_identificador": mesas_por_cliente[pedido.cliente_id],
+            "status": linha["status"],
+            "forma_pagamento": linha["forma_pagamento"],
+            "created_at": linha["created_at"],
+            "versao": linha["versao"],
+            "valor_total": linha["valor_total"],
+            "itens": resposta_itens
+        })
+
+    if itens:
+        db.execute(insert(models.PedidoItem), itens)
+    return respostas
+
 
-        pedido_item = models.PedidoItem(
-            pedido_id=db_pedido.id,
-            produto_id=produto.id,
-            quantidade=item.quantidade,
-            valor_unitario=produto.preco
+def _publicar_pedidos_criados(pedidos: list[dict]) -> None:
+    for pedido in pedidos:
+        eventos.publicar(
+            "pedido_criado",
+            schemas.PedidoResponse.model_validate(pedido).model_dump_json()
         )
-        itens.append(pedido_item)
 
-    db.add_all(itens)  # ⚠️ Isso garante que todos os itens sejam salvos corretamente
+
+def _clientes_com_conta_fechada(db: Session, cliente_ids) -> set[int]:
+    """
+    Rechecagem, depois do INSERT dos pedidos e na mesma transação, dos
+    clientes validados como de conta aberta.
+
+    A leitura com trava compartilhada (ignorada pelo SQLite, onde o INSERT já
+    segura a trava de escrita do banco) vê o fechamento que fez commit entre a
+    validação e o INSERT e impede que um fechamento concorrente termine antes
+    do commit do pedido (ver fechar_conta_mesa).
+    """
+    return set(db.execute(
+        select(models.Cliente.id)
+        .where(models.Cliente.id.in_(set(cliente_ids)), models.Cliente.conta_fechada_em.isnot(None))
+        .with_for_update(read=True)
+    ).scalars())
+
+
+def create_pedido(db: Session, pedido: schemas.PedidoCreate) -> dict:
+    mesas_por_cliente, contas_fechadas = get_mesas_por_clientes(db, [pedido.cliente_id])
+    produtos = get_produtos_por_ids(db, (item.produto_id for item in pedido.itens))
+
+    erro = _validar_pedido(pedido, mesas_por_cliente, contas_fechadas, produtos)
+    if erro:
+        raise HTTPException(status_code=erro[0], detail=erro[1])
+
+    resposta = _inserir_pedidos(db, [pedido], produtos, mesas_por_cliente)[0]
+    if _clientes_com_conta_fechada(db, [pedido.cliente_id]):
+        db.rollback()
+        erro = _erro_conta_fechada(pedido.cliente_id)
+        raise HTTPException(status_code=erro[0], detail=erro[1])
     db.commit()
-    db.refresh(db_pedido)
-    return db_pedido
+    _publicar_pedidos_criados([resposta])
+    return resposta
 
 
+def create_pedidos_lote(db: Session, pedidos: list[schemas.PedidoCreate]) -> list[dict]:
+    """
+    Cria vários pedidos (sincronização offline dos POS) em uma transação.
 
-def get_pedidos(db: Session):
-    pedidos = db.query(models.Pedido).all()
+    Clientes e produtos de todo o lote são validados com uma consulta IN
+    cada; pedidos inválidos são reportados sem impedir os demais.
+    """
+    mesas_por_cliente, contas_fechadas = get_mesas_por_clientes(db, (p.cliente_id for p in pedidos))
+    produtos = get_produtos_por_ids(
+        db, (item.produto_id for p in pedidos for item in p.itens)
+    )
 
-    response = []
-    for pedido in pedidos:
-        response.append({
-            "id": pedido.id,
-            "cliente_id": pedido.cliente_id,
-            '''"cliente_nome": pedido.cliente.nome,  # Se você fez o relacionamento correto'''
-            "status": pedido.status,
-            "forma_pagamento": pedido.forma_pagamento,
-            "itens": [
-                {
-                    "produto": {
-                        "id": item.produto.id,
-                        "nome": item.produto.nome,
-                        "preco": item.valor_unitario
-                    },
-                    "quantidade": item.quantidade,
-                    "valor_unitario": item.valor_unitario
-                }
-                for item in pedido.itens
-            ]
+    resultados: list[dict | None] = []
+    validos = []
+    for indice, pedido in enumerate(pedidos):
+        erro = _validar_pedido(pedido, mesas_por_cliente, contas_fechadas, produtos)
+        if erro:
+            resultados.append({"indice": indice, "status": "erro", "codigo": erro[0], "erro": erro[1]})
+        else:
+            validos.append((indice, pedido))
+            resultados.append(None)
+
+    if validos:
+        criados = _inserir_pedidos(db, [p for _, p in validos], produtos, mesas_por_cliente)
+        if _clientes_com_conta_fechada(db, (p.cliente_id for _, p in validos)):
+            # Uma conta fechou entre a validação e o INSERT: valida o lote de novo
+            db.rollback()
+            return create_pedidos_lote(db, pedidos)
+        db.commit()
+        _publicar_pedidos_criados(criados)
+        for (indice, _), pedido_criado in zip(validos, criados):
+            resultados[indice] = {"indice": indice, "status": "criado", "pedido": pedido_criado}
+
+    return resultados
+
+
+
+def _consultar_pedidos(
+    db: Session,
+    pedido_model,
+    item_model,
+    limite: int,
+    apos_id: int | None,
+    status: str | None,
+    desde: datetime | None,
+    ate: datetime | None,
+) -> list[dict]:
+    """
+    Página de pedidos ordenada por id (paginação por keyset), das tabelas
+    quentes (Pedido/PedidoItem) ou do arquivo (PedidoHistorico/PedidoItemHistorico).
+
+    Usa sempre duas consultas, independente do tamanho da página:
+    1. pedidos + identificador da mesa (JOIN clientes/mesas)
+    2. itens da página + produtos (JOIN, filtrado pelos ids da página)
+
+    As linhas vêm direto das tuplas das consultas, sem instanciar objetos do
+    ORM; os dicts já têm o formato de schemas.PedidoResponse.
+    """
+    query = (
+        select(
+            pedido_model.id,
+            pedido_model.cliente_id,
+            models.Mesa.identificador,
+            pedido_model.status,
+            pedido_model.forma_pagamento,
+            pedido_model.created_at,
+            pedido_model.versao,
+            pedido_model.valor_total,
+        )
+        .join(models.Cliente, pedido_model.cliente_id == models.Cliente.id)
+        .join(models.Mesa, models.Cliente.mesa_id == models.Mesa.id)
+    )
+
+    if apos_id is not None:
+        query = query.where(pedido_model.id > apos_id)
+    if status:
+        query = query.where(pedido_model.status == status.upper())
+    if desde:
+        query = query.where(pedido_model.created_at >= desde)
+    if ate:
+        query = query.where(pedido_model.created_at < ate)
+
+    pedidos = {}
+    for id_, cliente_id, mesa_identificador, status_, forma_pagamento, created_at, versao, valor_total in db.execute(
+        query.order_by(pedido_model.id).limit(limite)
+    ):
+        pedidos[id_] = {
+            "id": id_,
+            "cliente_id": cliente_id,
+            "mesa_identificador": mesa_identificador,
+            "status": status_,
+            "forma_pagamento": forma_pagamento,
+            "created_at": created_at,
+            "versao": versao,
+            "valor_total": valor_total,
+            "itens": [],
+        }
+    if not pedidos:
+        return []
+
+    itens = db.execute(
+        select(
+            item_model.pedido_id,
+            models.Produto.id,
+            models.Produto.nome,
+            models.Produto.preco,
+            item_model.quantidade,
+            item_model.valor_unitario,
+        )
+        .join(models.Produto, item_model.produto_id == models.Produto.id)
+        .where(item_model.pedido_id.in_(pedidos))
+        .order_by(item_model.id)
+    )
+    for pedido_id, produto_id, nome, preco, quantidade, valor_unitario in itens:
+        pedidos[pedido_id]["itens"].append({
+            "produto": {"id": produto_id, "nome": nome, "preco": preco},
+            "quantidade": quantidade,
+            "valor_unitario": valor_unitario,
         })
+    return list(pedidos.values())
+
+
+def get_pedidos(
+    db: Session,
+    limite: int = 100,
+    apos_id: int | None = None,
+    status: str | None = None,
+    desde: datetime | None = None,
+    ate: datetime | None = None,
+) -> list[dict]:
+    """Página de pedidos das tabelas quentes (ver _consultar_pedidos)"""
+    return _consultar_pedidos(
+        db, models.Pedido, models.PedidoItem, limite, apos_id, status, desde, ate
+    )
 
-    return response
 
+def get_pedidos_historico(
+    db: Session,
+    desde: datetime,
+    ate: datetime,
+    limite: int = 500,
+    apos_id: int | None = None,
+    status: str | None = None,
+) -> list[dict]:
+    """Página de pedidos arquivados criados em [desde, ate), para a contabilidade"""
+    return _consultar_pedidos(
+        db, models.PedidoHistorico, models.PedidoItemHistorico, limite, apos_id, status, desde, ate
+    )
 
 
+def iter_pedidos(db: Session, tamanho_lote: int = 500, **filtros) -> Iterator[list[dict]]:
+    """
+    Percorre todos os pedidos em lotes de `tamanho_lote`, seguindo o cursor por id.
+
+    Cada lote é lido com get_pedidos (tuplas, sem objetos na sessão), então a
+    memória não cresce com o tamanho da tabela.
+    """
+    apos_id = filtros.pop("apos_id", None)
+    while True:
+        lote = get_pedidos(db, limite=tamanho_lote, apos_id=apos_id, **filtros)
+        if not lote:
+            return
+        yield lote
+        if len(lote) < tamanho_lote:
+            return
+        apos_id = lote[-1]["id"]
+
+
+
+
+
+def _atualizar_status_condicional(
+    db: Session,
+    esperadas: dict[int, int],
+    origens: list[str],
+    novo: str
+) -> dict[int, int]:
+    """
+    UPDATE condicional por (id, versao) e status de origem; retorna
+    {pedido_id: nova versao} apenas dos pedidos que este UPDATE alterou.
+
+    Com UPDATE ... RETURNING (SQLite, PostgreSQL) é um único comando; no MySQL,
+    sem RETURNING, um UPDATE por pedido e o rowcount de cada um.
+    """
+    condicao = models.Pedido.status.in_(origens)
+    valores = {models.Pedido.status: novo, models.Pedido.versao: models.Pedido.versao + 1}
+
+    if db.get_bind().dialect.update_returning:
+        linhas = db.execute(
+            update(models.Pedido)
+            .where(tuple_(models.Pedido.id, models.Pedido.versao).in_(list(esperadas.items())), condicao)
+            .values(valores)
+            .returning(models.Pedido.id, models.Pedido.versao)
+            .execution_options(synchronize_session=False)
+        )
+        return dict(linhas.all())
+
+    vencedores = {}
+    for pedido_id, versao in esperadas.items():
+        resultado = db.execute(
+            update(models.Pedido)
+            .where(models.Pedido.id == pedido_id, models.Pedido.versao == versao, condicao)
+            .values(valores)
+            .execution_options(synchronize_session=False)
+        )
+        if resultado.rowcount == 1:
+            vencedores[pedido_id] = versao + 1
+    return vencedores
+
+
+def atualizar_status_pedidos(
+    db: Session,
+    pedido_ids: list[int],
+    status: str,
+    versoes: dict[int, int] | None = None
+) -> list[dict]:
+    """
+    Move vários pedidos para `status` com um único UPDATE condicional.
+
+    O UPDATE só altera linhas que ainda estão em um status de origem válido e
+    na versão lida (ou na informada em `versoes`), incrementando `versao`.
+    Se dois bartenders aprovam o mesmo pedido, só o primeiro UPDATE encontra a
+    linha como PENDENTE; o outro recebe "conflito" — sem SELECT ... FOR UPDATE.
+    Com UPDATE ... RETURNING são no máximo três comandos, qualquer que seja o
+    tamanho do lote (ver _atualizar_status_condicional).
+    """
+    novo = status.upper()
+    origens = [
+        origem for origem, destinos in models.TransicoesStatusPedido.items()
+        if novo in destinos
+    ]
+    ids = list(dict.fromkeys(pedido_ids))
+
+    atuais = {
+        pedido_id: (status_atual, versao)
+        for pedido_id, status_atual, versao in db.query(
+            models.Pedido.id, models.Pedido.status, models.Pedido.versao
+        ).filter(models.Pedido.id.in_(ids))
+    }
+
+    resultados = {}
+    esperadas = {}
+    for pedido_id in ids:
+        if pedido_id not in atuais:
+            resultados[pedido_id] = {"id": pedido_id, "resultado": "nao_encontrado"}
+            continue
+        status_atual, versao = atuais[pedido_id]
+        versao_esperada = (versoes or {}).get(pedido_id, versao)
+        if status_atual not in origens:
+            resultados[pedido_id] = {
+                "id": pedido_id, "resultado": "transicao_invalida",
+                "status": status_atual, "versao": versao
+            }
+        elif versao_esperada != versao:
+            resultados[pedido_id] = {
+                "id": pedido_id, "resultado": "conflito",
+                "status": status_atual, "versao": versao
+            }
+        else:
+            esperadas[pedido_id] = versao
+
+    if esperadas:
+        # O próprio UPDATE diz quem venceu: uma linha só casa se ainda está no
+        # status de origem e na versão esperada. Reler depois não serve — quem
+        # perdeu a corrida leria a linha já gravada pelo outro bartender.
+        vencedores = _atualizar_status_condicional(db, esperadas, origens, novo)
+        perdedores = esperadas.keys() - vencedores.keys()
+        atuais_perdedores = db.query(
+            models.Pedido.id, models.Pedido.status, models.Pedido.versao
+        ).filter(models.Pedido.id.in_(perdedores)).all() if perdedores else []
+        db.commit()
+
+        for pedido_id, status_atual, versao in atuais_perdedores:
+            resultados[pedido_id] = {
+                "id": pedido_id, "resultado": "conflito",
+                "status": status_atual, "versao": versao
+            }
+        for pedido_id in perdedores - resultados.keys():
+            resultados[pedido_id] = {"id": pedido_id, "resultado": "nao_encontrado"}
+        for pedido_id, versao in vencedores.items():
+            resultados[pedido_id] = {
+                "id": pedido_id, "resultado": "atualizado", "status": novo, "versao": versao
+            }
+            eventos.publicar(
+                "pedido_status",
+                json.dumps({"id": pedido_id, "status": novo, "versao": versao})
+            )
 
+    return [resultados[pedido_id] for pedido_id in ids]
 
-def update_pedido_status(db: Session, pedido_id: int, status: str) -> models.Pedido | None:
-    pedido = db.query(models.Pedido).filter(models.Pedido.id == pedido_id).first()
-    if not pedido:
-        return None
 
-    pedido.status = status.upper()
-    db.commit()
-    db.refresh(pedido)
-    return pedido
+def update_pedido_status(
+    db: Session,
+    pedido_id: int,
+    status: str,
+    versao: int | None = None
+) -> dict:
+    versoes = {pedido_id: versao} if versao is not None else None
+    return atualizar_status_pedidos(db, [pedido_id], status, versoes)[0]
 
 
 
-def listar_clientes_mesas_valor_total(db: Session) -> list[dict]:
-    clientes = db.query(models.Cliente).all()
+def _somar_total_cliente(db: Session, cliente_id: int, valor: Decimal) -> None:
+    """Incrementa o total do cliente na mesma transação do pedido (UPDATE atômico)"""
+    atualizados = (
+        db.query(models.ClienteTotal)
+        .filter(models.ClienteTotal.cliente_id == cliente_id)
+        .update(
+            {models.ClienteTotal.valor_total: models.ClienteTotal.valor_total + valor},
+            synchronize_session=False
+        )
+    )
+    if not atualizados:
+        # Clientes criados antes de ativar TOTAIS_MATERIALIZADOS ainda não têm linha
+        db.add(models.ClienteTotal(cliente_id=cliente_id, valor_total=valor))
+
+
+def _total_pedidos_cliente(pedido_model, item_model=None):
+    """
+    Subconsulta correlacionada: soma dos pedidos do cliente, pelo valor_total
+    gravado em cada pedido ou, com `item_model`, recalculada a partir dos itens
+    """
+    if item_model is None:
+        return (
+            select(func.coalesce(func.sum(pedido_model.valor_total), 0))
+            .where(pedido_model.cliente_id == models.Cliente.id)
+            .scalar_subquery()
+        )
+    return (
+        select(func.coalesce(func.sum(item_model.valor_unitario * item_model.quantidade), 0))
+        .join(pedido_model, item_model.pedido_id == pedido_model.id)
+        .where(pedido_model.cliente_id == models.Cliente.id)
+        .scalar_subquery()
+    )
 
-    response = []
-    for cliente in clientes:
-        pedidos = (
-            db.query(models.Pedido)
-            .filter(models.Pedido.cliente_id == cliente.id)
-            .all()
+
+def _select_totais_calculados(de_itens: bool = False):
+    """
+    SELECT cliente_id, mesa_id, total somando pedidos quentes e arquivados.
+
+    Uma subconsulta por tabela, cada uma pelo índice de cliente_id, em vez de
+    juntar as duas na mesma agregação. A listagem soma Pedido.valor_total; a
+    verificação/reconstrução (`de_itens`) recalcula a partir dos itens.
+    """
+    if de_itens:
+        total = (
+            _total_pedidos_cliente(models.Pedido, models.PedidoItem)
+            + _total_pedidos_cliente(models.PedidoHistorico, models.PedidoItemHistorico)
         )
+    else:
+        total = _total_pedidos_cliente(models.Pedido) + _total_pedidos_cliente(models.PedidoHistorico)
+    return select(models.Cliente.id, models.Cliente.mesa_id, total.label("valor_total"))
+
 
-        total = 0
-        for pedido in pedidos:
-            for item in pedido.itens:
-                total += float(item.valor_unitario) * item.quantidade
+def listar_clientes_mesas_valor_total(db: Session) -> list[dict]:
+    if config.TOTAIS_MATERIALIZADOS:
+        query = (
+            select(
+                models.Cliente.id,
+                models.Cliente.mesa_id,
+                func.coalesce(models.ClienteTotal.valor_total, 0)
+            )
+            .outerjoin(models.ClienteTotal, models.ClienteTotal.cliente_id == models.Cliente.id)
+        )
+    else:
+        query = _select_totais_calculados()
+
+    linhas = db.execute(query.order_by(models.Cliente.id)).all()
+    return [
+        {
+            "cliente_id": cliente_id,
+            "mesa_id": mesa_id,
+            "valor_total_pedidos": valor_total
+        }
+        for cliente_id, mesa_id, valor_total in linhas
+    ]
+
+
+def verificar_totais_clientes(db: Session) -> list[dict]:
+    """Compara a tabela cliente_totais com o total calculado a partir dos itens"""
+    calculados = {
+        cliente_id: Decimal(valor_total)
+        for cliente_id, _, valor_total in db.execute(_select_totais_calculados(de_itens=True)).all()
+    }
+    armazenados = dict(
+        db.query(models.ClienteTotal.cliente_id, models.ClienteTotal.valor_total).all()
+    )
 
-        response.append({
-            "cliente_id": cliente.id,
-            "mesa_id": cliente.mesa_id,
-            "valor_total_pedidos": total
+    divergencias = []
+    for cliente_id, calculado in calculados.items():
+        armazenado = armazenados.get(cliente_id, Decimal("0"))
+        if armazenado != calculado:
+            divergencias.append({
+                "cliente_id": cliente_id,
+                "armazenado": armazenado,
+                "calculado": calculado
+            })
+    return divergencias
+
+
+def reconstruir_totais_clientes(db: Session) -> int:
+    """Recria cliente_totais a partir dos itens em uma única transação"""
+    calculados = _select_totais_calculados(de_itens=True).subquery()
+    db.query(models.ClienteTotal).delete(synchronize_session=False)
+    resultado = db.execute(
+        insert(models.ClienteTotal).from_select(
+            ["cliente_id", "valor_total"],
+            select(calculados.c.id, calculados.c.valor_total)
+        )
+    )
+    db.commit()
+    return resultado.rowcount
+
+
+# -------- CONTA DA MESA --------
+
+def _ler_conta_mesa(db: Session, identificador: str, fechada_em: datetime | None = None) -> dict:
+    linhas = db.execute(
+        select(
+            models.Mesa.identificador,
+            models.Cliente.id,
+            models.Cliente.created_at,
+            models.Pedido.id,
+            models.Pedido.status,
+            models.Pedido.forma_pagamento,
+            models.Pedido.created_at,
+            models.Pedido.valor_total,
+        )
+        .select_from(models.Mesa)
+        .outerjoin(
+            models.Cliente,
+            and_(
+                models.Cliente.mesa_id == models.Mesa.id,
+                models.Cliente.conta_fechada_em.is_(None) if fechada_em is None
+                else models.Cliente.conta_fechada_em == fechada_em
+            )
+        )
+        .outerjoin(models.Pedido, models.Pedido.cliente_id == models.Cliente.id)
+        .where(models.Mesa.identificador == identificador)
+        .order_by(models.Cliente.id, models.Pedido.created_at, models.Pedido.id)
+    ).all()
+    if not linhas:
+        raise ValueError(f"Mesa com identificador '{identificador}' não encontrada")
+
+    clientes = {}
+    for _, cliente_id, cliente_created_at, pedido_id, status, forma_pagamento, created_at, valor_total in linhas:
+        if cliente_id is None:
+            continue  # Mesa sem conta aberta
+        cliente = clientes.setdefault(cliente_id, {
+            "cliente_id": cliente_id,
+            "created_at": cliente_created_at,
+            "pedidos": [],
+            "valor_total": Decimal("0"),
+        })
+        if pedido_id is None:
+            continue
+        cliente["pedidos"].append({
+            "id": pedido_id,
+            "status": status,
+            "forma_pagamento": forma_pagamento,
+            "created_at": created_at,
+            "valor_total": valor_total,
         })
+        if status != "RECUSADO":
+            cliente["valor_total"] += valor_total
+
+    return {
+        "mesa_identificador": linhas[0][0],
+        "clientes": list(clientes.values()),
+        "valor_total": sum((c["valor_total"] for c in clientes.values()), Decimal("0")),
+        "fechada_em": fechada_em,
+    }
+
+
+def get_conta_mesa(db: Session, identificador: str) -> dict:
+    """
+    Conta aberta da mesa: clientes com conta_fechada_em nulo, seus pedidos e totais.
+
+    Uma única consulta: mesa pelo identificador, clientes pelo índice
+    (mesa_id, conta_fechada_em) e pedidos por ix_pedidos_cliente_id_created_at,
+    usando o valor_total gravado em cada pedido (sem ler os itens).
+    Pedidos RECUSADO aparecem na conta mas não somam no total.
+    """
+    return _ler_conta_mesa(db, identificador)
+
+
+def fechar_conta_mesa(db: Session, identificador: str) -> dict:
+    """
+    Fecha a conta aberta da mesa e retorna a conta fechada.
+
+    Primeiro o UPDATE marca conta_fechada_em nos clientes da conta aberta e
+    trava essas linhas; só depois a conta é lida, na mesma transação. Um pedido
+    que já passou da validação ou termina antes (e aparece aqui, PENDENTE,
+    o que desfaz o fechamento) ou é recusado pela rechecagem de
+    _clientes_com_conta_fechada. Um cliente que chegue à mesa depois abre
+    uma conta nova. Os pedidos finalizados de contas fechadas podem ir para o
+    arquivo (python -m app.arquivamento --contas-fechadas).
+    """
+    # Sem fração de segundo: a leitura abaixo compara com o valor gravado (DATETIME)
+    agora = datetime.utcnow().replace(microsecond=0)
+    fechados = db.execute(
+        update(models.Cliente)
+        .where(
+            models.Cliente.mesa_id == select(models.Mesa.id)
+            .where(models.Mesa.identificador == identificador)
+            .scalar_subquery(),
+            models.Cliente.conta_fechada_em.is_(None)
+        )
+        .values(conta_fechada_em=agora)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    conta = _ler_conta_mesa(db, identificador, agora)
+    if not fechados:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"A mesa '{identificador}' não tem conta aberta")
+
+    pendentes = [
+        pedido["id"]
+        for cliente in conta["clientes"]
+        for pedido in cliente["pedidos"]
+        if pedido["status"] == "PENDENTE"
+    ]
+    if pendentes:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"Pedidos pendentes na conta: {pendentes}")
 
-    return response
+    db.commit()
+    return conta
@@ -0,0 +1,109 @@
+"""
+Versões assíncronas das funções de crud usadas nos caminhos quentes.
+
+A lógica continua em `crud`; aqui ela é executada com `AsyncSession.run_sync`,
+de modo que o SQL passa pelo driver assíncrono e a requisição não prende uma
+thread do threadpool enquanto espera o banco. Com uma `Session` comum (modo
+síncrono) a mesma chamada vai para o threadpool, então os endpoints têm um
+único código para os dois modos.
+"""
+from typing import TYPE_CHECKING, AsyncIterator
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from . import agrupamento, catalogo, config, crud, schemas
+
+if TYPE_CHECKING:
+    # Importado só para tipagem: o modo síncrono não exige greenlet/driver assíncrono
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def executar(db: "Session | AsyncSession", fn, *args, **kwargs):
+    """Chama `fn(sessao_sincrona, *args, **kwargs)` sem bloquear o event loop"""
+    if hasattr(db, "run_sync"):  # AsyncSession
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+async def welcome(db: "Session | AsyncSession", qrcode_base64: str) -> dict | None:
+    """
+    Mesa pelo QR Code + novo cliente + cardápio.
+
+    Com WELCOME_AGRUPAMENTO_MS > 0 o cliente é criado pelo agrupador
+    (app/agrupamento.py), junto com os das leituras simultâneas, em um único
+    commit; senão, em uma única ida ao executor com commit próprio.
+    """
+    if config.WELCOME_AGRUPAMENTO_MS > 0:
+        def _mesa_e_cardapio(sessao: Session):
+            mesa = crud.get_mesa_by_qrcode(sessao, qrcode_base64)
+            encontrado = mesa and (mesa.id, mesa.identificador, catalogo.cache.obter(sessao).produtos)
+            # Encerra a transação de leitura: a conexão volta ao pool em vez de
+            # ficar presa enquanto a requisição espera o agrupador
+            sessao.rollback()
+            return encontrado or None
+
+        encontrado = await executar(db, _mesa_e_cardapio)
+        if encontrado is None:
+            return None
+        mesa_id, mesa_identificador, produtos = encontrado
+        return {
+            "mesa_identificador": mesa_identificador,
+            "cliente_id": await agrupamento.clientes.criar(mesa_id),
+            "produtos": produtos
+        }
+
+    def _welcome(sessao: Session) -> dict | None:
+        mesa = crud.get_mesa_by_qrcode(sessao, qrcode_base64)
+        if not mesa:
+            return None
+        cliente = crud.create_cliente(sessao, mesa.identificador)
+        return {
+            "mesa_identificador": mesa.identificador,
+            "cliente_id": cliente.id,
+            "produtos": catalogo.cache.obter(sessao).produtos
+        }
+
+    return await executar(db, _welcome)
+
+
+async def get_catalogo(db: "Session | AsyncSession") -> catalogo.Catalogo:
+    return await executar(db, catalogo.cache.obter)
+
+
+async def create_pedido(db: "Session | AsyncSession", pedido: schemas.PedidoCreate) -> dict:
+    return await executar(db, crud.create_pedido, pedido)
+
+
+async def create_pedidos_lote(db: "Session | AsyncSession", pedidos: list[schemas.PedidoCreate]) -> list[dict]:
+    return await executar(db, crud.create_pedidos_lote, pedidos)
+
+
+async def atualizar_status_pedidos(
+    db: "Session | AsyncSession",
+    pedido_ids: list[int],
+    status: str,
+    versoes: dict[int, int] | None = None
+) -> list[dict]:
+    return await executar(db, crud.atualizar_status_pedidos, pedido_ids, status, versoes)
+
+
+async def get_pedidos(db: "Session | AsyncSession", **filtros) -> list[dict]:
+    return await executar(db, crud.get_pedidos, **filtros)
+
+
+async def iter_pedidos(
+    db: "Session | AsyncSession",
+    tamanho_lote: int = 500,
+    **filtros
+) -> AsyncIterator[list[dict]]:
+    """Equivalente assíncrono de crud.iter_pedidos"""
+    apos_id = filtros.pop("apos_id", None)
+    while True:
+        lote = await get_pedidos(db, limite=tamanho_lote, apos_id=apos_id, **filtros)
+        if not lote:
+            return
+        yield lote
+        if len(lote) < tamanho_lote:
+            return
+        apos_id = lote[-1]["id"]
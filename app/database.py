@@ -1,8 +1,15 @@
 import os
+import threading
+import time
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from dotenv import load_dotenv
 
+from app import config
+
 load_dotenv()
 
 DB_USER = os.getenv("DB_USER")
@@ -10,16 +17,197 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST")
 DB_NAME = os.getenv("DB_NAME")
 
-DATABASE_URL = f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+# DATABASE_URL permite apontar para outro banco (ex.: sqlite:///bar.db em benchmarks)
+DATABASE_URL = os.getenv("DATABASE_URL") or f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+
+# Driver assíncrono equivalente a cada driver síncrono suportado
+DRIVERS_ASYNC = {
+    "mysql": "mysql+aiomysql",
+    "mysql+mysqlconnector": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _url_assincrona(url: str) -> str:
+    url = make_url(url)
+    return url.set(drivername=DRIVERS_ASYNC.get(url.drivername, url.drivername)).render_as_string(
+        hide_password=False
+    )
+
+
+def _connect_args(url: str) -> dict:
+    # SQLite: a sessão é usada na thread do threadpool, não na que abriu a conexão
+    return {"check_same_thread": False} if url.startswith("sqlite") else {}
+
+
+# -------- POOL DE CONEXÕES --------
+
+class EstatisticasEspera:
+    """Tempo que as requisições esperaram por uma conexão livre no pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+
+    def registrar(self, espera: float, timeout: bool = False) -> None:
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.espera_total += espera
+            self.espera_maxima = max(self.espera_maxima, espera)
+
+    def como_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "espera_total_s": round(self.espera_total, 6),
+                "espera_media_ms": round(1000 * self.espera_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "espera_maxima_ms": round(1000 * self.espera_maxima, 3),
+            }
+
+
+class _MedicaoEspera:
+    """Mixin de pool que mede quanto tempo cada checkout esperou"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estatisticas = EstatisticasEspera()
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except PoolTimeoutError:
+            self.estatisticas.registrar(time.perf_counter() - inicio, timeout=True)
+            raise
+        self.estatisticas.registrar(time.perf_counter() - inicio)
+        return conexao
+
+
+class PoolMedido(_MedicaoEspera, QueuePool):
+    pass
+
 
-engine = create_engine(DATABASE_URL)
+class PoolMedidoAsync(_MedicaoEspera, AsyncAdaptedQueuePool):
+    pass
+
+
+def _opcoes_pool(url: str, pool_class) -> dict:
+    if url.startswith("sqlite") and ":memory:" in url:
+        return {}  # SQLite em memória usa um pool próprio (uma conexão)
+    return {
+        "poolclass": pool_class,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+
+
+def aquecer_pool(engine_, conexoes: int = config.DB_POOL_AQUECER) -> int:
+    """Abre `conexoes` conexões e as devolve ao pool; retorna quantas abriu"""
+    abertas = []
+    try:
+        for _ in range(conexoes):
+            conn = engine_.connect()
+            abertas.append(conn)
+            conn.exec_driver_sql("SELECT 1")
+    finally:
+        for conn in abertas:
+            conn.close()
+    return len(abertas)
+
+
+async def aquecer_pool_async(engine_, conexoes: int = config.DB_POOL_AQUECER) -> int:
+    """Equivalente de aquecer_pool para o AsyncEngine, abrindo as conexões em paralelo"""
+    import asyncio
+
+    async def abrir():
+        conn = await engine_.connect()
+        await conn.exec_driver_sql("SELECT 1")
+        return conn
+
+    resultados = await asyncio.gather(*(abrir() for _ in range(conexoes)), return_exceptions=True)
+    abertas = [r for r in resultados if not isinstance(r, BaseException)]
+    for conn in abertas:
+        await conn.close()
+    for r in resultados:
+        if isinstance(r, BaseException):
+            raise r
+    return len(abertas)
+
+
+def estatisticas_pool(engine_) -> dict | None:
+    """Conexões em uso, ociosas, overflow e tempos de espera do pool do engine"""
+    if engine_ is None:
+        return None
+    pool = engine_.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__name__,
+        "tamanho": pool.size(),
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "em_uso": pool.checkedout(),
+        "ociosas": pool.checkedin(),
+        # overflow() fica negativo enquanto o pool ainda não abriu todas as conexões
+        "overflow": max(pool.overflow(), 0),
+        "timeout_s": config.DB_POOL_TIMEOUT,
+        "recycle_s": config.DB_POOL_RECYCLE,
+        "pre_ping": config.DB_POOL_PRE_PING,
+        "espera": pool.estatisticas.como_dict() if hasattr(pool, "estatisticas") else None,
+    }
+
+
+engine = create_engine(
+    DATABASE_URL,
+    connect_args=_connect_args(DATABASE_URL),
+    **_opcoes_pool(DATABASE_URL, PoolMedido)
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _url_assincrona(DATABASE_URL)
+async_engine = None
+AsyncSessionLocal = None
+if config.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        **_opcoes_pool(ASYNC_DATABASE_URL, PoolMedidoAsync)
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=True
+    )
+
 Base = declarative_base()
 
 if __name__ == "__main__":
+    import sys
+
     try:
         with engine.connect() as conn:
             print("✅ Conexão com o banco bem-sucedida!")
     except Exception as e:
         print("❌ Erro ao conectar no banco:", e)
+        sys.exit(1)
+
+    # O schema é gerenciado pelo Alembic: `alembic upgrade head` monta um
+    # banco vazio desde a revisão base. Atalho para SQLite descartável (testes):
+    #   python -m app.database --criar-tabelas && alembic stamp head
+    if "--criar-tabelas" in sys.argv[1:]:
+        from app import database, models
+
+        models.Base.metadata.create_all(bind=database.engine)
+        print("✅ Tabelas criadas")
@@ -0,0 +1,100 @@
+"""
+Feed em tempo real dos pedidos para as telas da cozinha/bar (Server-Sent Events).
+
+`publicar` é chamado por crud após o commit de um pedido novo ou de uma
+mudança de status; o evento vai para um buffer circular e para a fila de cada
+tela conectada. Ao reconectar com `Last-Event-ID`, a tela recebe só os eventos
+que perdeu (se ainda estiverem no buffer); caso contrário recebe `reset` e
+deve recarregar via GET /pedidos/.
+
+O broadcaster é por processo: com vários workers, cada tela recebe os eventos
+dos pedidos criados no worker ao qual está conectada.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class Evento:
+    id: str
+    seq: int
+    tipo: str
+    dados: str  # JSON já serializado (uma vez, para todas as telas)
+
+    def formatar(self) -> str:
+        return f"id: {self.id}\nevent: {self.tipo}\ndata: {self.dados}\n\n"
+
+
+@dataclass(eq=False)
+class Assinatura:
+    loop: asyncio.AbstractEventLoop
+    fila: asyncio.Queue
+    atrasada: bool = field(default=False)
+
+    def entregar(self, evento: Evento) -> None:
+        try:
+            self.fila.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Tela lenta demais: encerra o stream; ela reconecta e recupera pelo buffer
+            self.atrasada = True
+
+
+class Broadcaster:
+    def __init__(self, capacidade: int = 1000, fila_por_tela: int = 1000):
+        # Prefixo do processo: ids de outro worker/execução nunca são confundidos
+        self._prefixo = format(int(time.time() * 1000), "x")
+        self._seq = 0
+        self._buffer: deque[Evento] = deque(maxlen=capacidade)
+        self._assinaturas: set[Assinatura] = set()
+        self._fila_por_tela = fila_por_tela
+        self._lock = threading.Lock()
+
+    def publicar(self, tipo: str, dados: str) -> None:
+        """Thread-safe: pode ser chamado do threadpool ou do event loop"""
+        with self._lock:
+            self._seq += 1
+            evento = Evento(id=f"{self._prefixo}-{self._seq}", seq=self._seq, tipo=tipo, dados=dados)
+            self._buffer.append(evento)
+            assinaturas = list(self._assinaturas)
+        for assinatura in assinaturas:
+            assinatura.loop.call_soon_threadsafe(assinatura.entregar, evento)
+
+    def assinar(self, ultimo_id: str | None) -> tuple[Assinatura, list[Evento] | None]:
+        """
+        Registra uma tela no event loop atual.
+
+        Retorna a assinatura e os eventos perdidos desde `ultimo_id`
+        (lista vazia se nada foi perdido, None se não é possível retomar).
+        """
+        assinatura = Assinatura(
+            loop=asyncio.get_running_loop(),
+            fila=asyncio.Queue(maxsize=self._fila_por_tela)
+        )
+        with self._lock:
+            self._assinaturas.add(assinatura)
+            perdidos = self._eventos_apos(ultimo_id) if ultimo_id else []
+        return assinatura, perdidos
+
+    def cancelar(self, assinatura: Assinatura) -> None:
+        with self._lock:
+            self._assinaturas.discard(assinatura)
+
+    def _eventos_apos(self, ultimo_id: str) -> list[Evento] | None:
+        prefixo, _, seq = ultimo_id.partition("-")
+        if prefixo != self._prefixo or not seq.isdigit() or int(seq) > self._seq:
+            return None
+        seq = int(seq)
+        primeiro = self._buffer[0].seq if self._buffer else self._seq + 1
+        if seq < primeiro - 1:
+            return None  # Já saiu do buffer
+        return [e for e in self._buffer if e.seq > seq]
+
+
+broadcaster = Broadcaster()
+
+
+def publicar(tipo: str, dados: str) -> None:
+    broadcaster.publicar(tipo, dados)
@@ -0,0 +1,47 @@
+"""
+Exportação dos cartões de QR Code das mesas em um ZIP transmitido sob demanda.
+
+O ZIP é escrito em um destino sem seek (zipfile usa data descriptors nesse
+caso) e drenado a cada arquivo, então a memória usada não depende de quantas
+mesas entram na exportação: só o lote atual de PNGs fica em memória.
+"""
+import re
+import time
+import zipfile
+from typing import Iterable, Iterator
+
+
+class _SaidaStream:
+    """Destino de escrita sem seek/tell: acumula bytes até serem drenados"""
+
+    def __init__(self):
+        self._partes: list[bytes] = []
+
+    def write(self, dados) -> int:
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self) -> None:
+        pass
+
+    def drenar(self) -> bytes:
+        dados = b"".join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+def nome_arquivo(nome: str, extensao: str = ".png") -> str:
+    """Nome de arquivo seguro (sem separadores de diretório), com a extensão"""
+    return re.sub(r"[^\w.-]", "_", nome) + extensao
+
+
+def zip_streaming(arquivos: Iterable[tuple[str, bytes]]) -> Iterator[bytes]:
+    """Gera os bytes de um ZIP (sem compressão: PNG já é comprimido) arquivo a arquivo"""
+    saida = _SaidaStream()
+    data_hora = time.localtime()[:6]
+    with zipfile.ZipFile(saida, mode="w", compression=zipfile.ZIP_STORED) as arquivo_zip:
+        for nome, dados in arquivos:
+            info = zipfile.ZipInfo(nome, date_time=data_hora)
+            arquivo_zip.writestr(info, dados)
+            yield saida.drenar()
+    yield saida.drenar()
@@ -0,0 +1,228 @@
+"""
+Idempotency-Key para os POSTs que criam registros (/pedidos/ e /welcome).
+
+Com Wi-Fi instável o app do cliente repete requisições; sem a chave, cada
+repetição cria outro Cliente ou outro Pedido. Com ela:
+
+1. A primeira requisição reserva a chave no banco (linha em
+   chaves_idempotencia, sem resposta) e executa normalmente.
+2. Ao terminar, a resposta é gravada na linha e no cache LRU do worker.
+3. Repetições com a mesma chave recebem a resposta gravada, sem tocar nos
+   inserts — do cache em memória ou, em outro worker, com uma leitura.
+
+A chave primária da tabela é o que garante que só uma requisição executa,
+mesmo com vários workers. Uma repetição que chega enquanto a original ainda
+processa recebe 409; a mesma chave com outro payload recebe 422. Se a
+requisição original falha, a reserva é liberada e a repetição executa de novo.
+
+Uso (limpeza periódica das chaves expiradas):
+    python -m app.idempotencia
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import config, crud_async, models
+
+# Reserva sem resposta há mais tempo que isto é de uma requisição que morreu
+# no meio (worker reiniciado); a próxima repetição pode assumi-la
+PRAZO_PROCESSAMENTO_S = 60
+
+
+@dataclass(frozen=True)
+class RespostaGravada:
+    impressao: str
+    status_code: int
+    corpo: str  # JSON
+    expira_em: float  # time.time()
+
+
+class CacheIdempotencia:
+    """LRU limitado com TTL das respostas já gravadas, por (escopo, chave)"""
+
+    def __init__(self, tamanho: int):
+        self.tamanho = tamanho
+        self._itens: OrderedDict[tuple[str, str], RespostaGravada] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, escopo: str, chave: str) -> RespostaGravada | None:
+        with self._lock:
+            item = self._itens.get((escopo, chave))
+            if item is None:
+                return None
+            if item.expira_em <= time.time():
+                del self._itens[(escopo, chave)]
+                return None
+            self._itens.move_to_end((escopo, chave))
+            return item
+
+    def put(self, escopo: str, chave: str, item: RespostaGravada) -> None:
+        with self._lock:
+            self._itens[(escopo, chave)] = item
+            self._itens.move_to_end((escopo, chave))
+            while len(self._itens) > self.tamanho:
+                self._itens.popitem(last=False)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+
+
+cache = CacheIdempotencia(config.IDEMPOTENCIA_CACHE_TAMANHO)
+
+
+def impressao_de(payload: str) -> str:
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _expira_em(criada_em: datetime) -> float:
+    return time.time() - (datetime.utcnow() - criada_em).total_seconds() + config.IDEMPOTENCIA_TTL_S
+
+
+# -------- Banco (funções síncronas, chamadas via crud_async.executar) --------
+
+def reservar(db: Session, escopo: str, chave: str, impressao: str) -> RespostaGravada | None:
+    """
+    Tenta reservar a chave. Retorna None se a reserva é desta requisição, ou a
+    resposta gravada por outra (status_code 0 = ainda em processamento).
+    """
+    for _ in range(2):
+        db.add(models.ChaveIdempotencia(escopo=escopo, chave=chave, impressao=impressao))
+        try:
+            db.commit()
+            return None
+        except IntegrityError:
+            db.rollback()
+
+        existente = db.get(models.ChaveIdempotencia, (escopo, chave))
+        if existente is None:
+            continue  # liberada entre o INSERT e o SELECT
+        idade = (datetime.utcnow() - existente.created_at).total_seconds()
+        abandonada = existente.status_code is None and idade > PRAZO_PROCESSAMENTO_S
+        if idade > config.IDEMPOTENCIA_TTL_S or abandonada:
+            db.delete(existente)
+            db.commit()
+            continue
+        resposta = RespostaGravada(
+            impressao=existente.impressao,
+            status_code=existente.status_code or 0,
+            corpo=existente.resposta or "",
+            expira_em=_expira_em(existente.created_at),
+        )
+        db.expunge(existente)
+        return resposta
+
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Idempotency-Key em uso por outra requisição; tente novamente"
+    )
+
+
+def concluir(db: Session, escopo: str, chave: str, status_code: int, corpo: str) -> datetime:
+    registro = db.get(models.ChaveIdempotencia, (escopo, chave))
+    registro.status_code = status_code
+    registro.resposta = corpo
+    criada_em = registro.created_at
+    db.commit()
+    return criada_em
+
+
+def liberar(db: Session, escopo: str, chave: str) -> None:
+    db.rollback()
+    db.execute(
+        delete(models.ChaveIdempotencia).where(
+            models.ChaveIdempotencia.escopo == escopo,
+            models.ChaveIdempotencia.chave == chave,
+            models.ChaveIdempotencia.status_code.is_(None),
+        )
+    )
+    db.commit()
+
+
+def remover_expiradas(db: Session) -> int:
+    limite = datetime.utcnow() - timedelta(seconds=config.IDEMPOTENCIA_TTL_S)
+    resultado = db.execute(
+        delete(models.ChaveIdempotencia).where(models.ChaveIdempotencia.created_at < limite)
+    )
+    db.commit()
+    return resultado.rowcount
+
+
+# -------- Endpoints --------
+
+def _repetir(gravada: RespostaGravada, impressao: str) -> Response:
+    if gravada.impressao != impressao:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key já usada com outro conteúdo"
+        )
+    if not gravada.status_code:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Requisição com esta Idempotency-Key ainda em processamento"
+        )
+    return Response(
+        content=gravada.corpo,
+        status_code=gravada.status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+async def executar(
+    db,
+    escopo: str,
+    chave: str | None,
+    payload: str,
+    fn: Callable[[], Awaitable],
+    modelo: type[BaseModel],
+    status_code: int = status.HTTP_200_OK,
+):
+    """
+    Executa `fn` uma única vez por (escopo, chave); repetições recebem a
+    resposta gravada. Sem chave, apenas executa `fn`.
+    """
+    if not chave:
+        return await fn()
+
+    impressao = impressao_de(payload)
+    gravada = cache.get(escopo, chave)
+    if gravada is None:
+        gravada = await crud_async.executar(db, reservar, escopo, chave, impressao)
+        if gravada is not None and gravada.status_code:
+            cache.put(escopo, chave, gravada)
+    if gravada is not None:
+        return _repetir(gravada, impressao)
+
+    try:
+        resultado = await fn()
+    except BaseException:
+        await crud_async.executar(db, liberar, escopo, chave)
+        raise
+
+    # Grava exatamente o que o response_model do endpoint produziria
+    corpo = json.dumps(modelo.model_validate(resultado).model_dump(mode="json"))
+    criada_em = await crud_async.executar(db, concluir, escopo, chave, status_code, corpo)
+    cache.put(escopo, chave, RespostaGravada(impressao, status_code, corpo, _expira_em(criada_em)))
+    return resultado
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+
+    sessao = SessionLocal()
+    try:
+        print(f"✅ {remover_expiradas(sessao)} chaves de idempotência expiradas removidas")
+    finally:
+        sessao.close()
@@ -0,0 +1,115 @@
+"""
+Leitura em streaming de catálogos para POST /produtos/importar.
+
+Formatos aceitos (pelo Content-Type):
+- text/csv: cabeçalho com as colunas `nome` e `preco`, separadas por `,` ou `;`
+  (com `;` o preço pode usar vírgula decimal, como no Excel em pt-BR)
+- application/x-ndjson: um objeto {"nome": ..., "preco": ...} por linha
+- application/json: lista de objetos (lida inteira, como em POST /produtos/)
+
+CSV e NDJSON são processados linha a linha, em lotes, sem carregar o corpo
+inteiro em memória. Cada linha deve conter um produto.
+"""
+import csv
+import json
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+
+from . import schemas
+
+
+class ErroImportacao(ValueError):
+    pass
+
+
+async def _linhas(corpo: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    pendente = b""
+    async for pedaco in corpo:
+        pendente += pedaco
+        *completas, pendente = pendente.split(b"\n")
+        for linha in completas:
+            yield linha.decode("utf-8-sig").rstrip("\r")
+    if pendente:
+        yield pendente.decode("utf-8-sig").rstrip("\r")
+
+
+def _produto(numero_linha: int, dados: dict) -> schemas.ProdutoCreate:
+    try:
+        return schemas.ProdutoCreate(**dados)
+    except ValidationError as e:
+        erros = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+        raise ErroImportacao(f"Linha {numero_linha}: {erros}")
+
+
+async def _registros_csv(linhas: AsyncIterator[str]) -> AsyncIterator[schemas.ProdutoCreate]:
+    cabecalho = None
+    delimitador = ","
+    numero_linha = 0
+    async for linha in linhas:
+        numero_linha += 1
+        if not linha.strip():
+            continue
+        if cabecalho is None:
+            delimitador = ";" if ";" in linha else ","
+            cabecalho = [c.strip().lower() for c in next(csv.reader([linha], delimiter=delimitador))]
+            if "nome" not in cabecalho or "preco" not in cabecalho:
+                raise ErroImportacao("Cabeçalho CSV deve conter as colunas 'nome' e 'preco'")
+            continue
+
+        valores = next(csv.reader([linha], delimiter=delimitador))
+        dados = dict(zip(cabecalho, (v.strip() for v in valores)))
+        if delimitador == ";" and "," in dados.get("preco", ""):
+            dados["preco"] = dados["preco"].replace(".", "").replace(",", ".")
+        yield _produto(numero_linha, {"nome": dados.get("nome"), "preco": dados.get("preco")})
+
+
+async def _registros_ndjson(linhas: AsyncIterator[str]) -> AsyncIterator[schemas.ProdutoCreate]:
+    numero_linha = 0
+    async for linha in linhas:
+        numero_linha += 1
+        if not linha.strip():
+            continue
+        try:
+            dados = json.loads(linha)
+        except json.JSONDecodeError as e:
+            raise ErroImportacao(f"Linha {numero_linha}: JSON inválido ({e.msg})")
+        yield _produto(numero_linha, dados)
+
+
+async def _registros_json(corpo: AsyncIterator[bytes]) -> AsyncIterator[schemas.ProdutoCreate]:
+    conteudo = b"".join([pedaco async for pedaco in corpo])
+    try:
+        dados = json.loads(conteudo)
+    except json.JSONDecodeError as e:
+        raise ErroImportacao(f"JSON inválido ({e.msg})")
+    if not isinstance(dados, list):
+        raise ErroImportacao("O corpo JSON deve ser uma lista de produtos")
+    for indice, item in enumerate(dados, start=1):
+        yield _produto(indice, item)
+
+
+async def ler_lotes(
+    corpo: AsyncIterator[bytes],
+    content_type: str,
+    tamanho_lote: int
+) -> AsyncIterator[list[schemas.ProdutoCreate]]:
+    """Converte o corpo da requisição em lotes de ProdutoCreate"""
+    tipo = content_type.split(";")[0].strip().lower()
+    if tipo in ("text/csv", "application/csv"):
+        registros = _registros_csv(_linhas(corpo))
+    elif tipo in ("application/x-ndjson", "application/jsonl"):
+        registros = _registros_ndjson(_linhas(corpo))
+    elif tipo == "application/json":
+        registros = _registros_json(corpo)
+    else:
+        raise ErroImportacao(f"Content-Type não suportado: {content_type or '(vazio)'}")
+
+    lote = []
+    async for produto in registros:
+        lote.append(produto)
+        if len(lote) >= tamanho_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
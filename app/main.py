@@ -1,25 +1,65 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app import models, schemas, crud
+from app import models, schemas, crud, crud_async, agrupamento, catalogo, config, eventos, exportacao, idempotencia, importacao, metricas, qrcodes, serializacao
+from app.cache_http import etag_confere
+from app.metricas import MetricasMiddleware
+from app import database
 from app.database import SessionLocal, engine
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
-import qrcode
-from fastapi.responses import StreamingResponse
-from io import BytesIO
-import base64
+from typing import List, Optional
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
 
 
+logger = logging.getLogger("bar_api")
+
+
+async def _aquecer() -> None:
+    """Abre as conexões do pool e carrega o cardápio antes da primeira requisição"""
+    await run_in_threadpool(database.aquecer_pool, engine)
+    if database.async_engine is not None:
+        await database.aquecer_pool_async(database.async_engine)
+        async with database.AsyncSessionLocal() as db:
+            await crud_async.get_catalogo(db)
+    else:
+        db = SessionLocal()
+        try:
+            await crud_async.get_catalogo(db)
+        finally:
+            db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # O schema é responsabilidade do Alembic (alembic upgrade head): nada de
+    # create_all aqui, que inspecionaria todas as tabelas a cada subida
+    try:
+        await _aquecer()
+    except Exception:
+        # Banco indisponível não impede a subida: as conexões abrem sob demanda
+        logger.warning("Falha no aquecimento do pool/cardápio", exc_info=True)
+    yield
+    agrupamento.clientes.encerrar()
+    qrcodes.encerrar_pool()
 
-models.Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Bar API",
     description="API para gerenciamento de pedidos",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
+app.add_middleware(MetricasMiddleware)
+metricas.instrumentar_engine(engine)
+if database.async_engine is not None:
+    metricas.instrumentar_engine(database.async_engine.sync_engine)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -28,6 +68,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# O QR Code de uma mesa nunca muda: pode ficar em cache no cliente/CDN
+CACHE_CONTROL_QRCODE = "public, max-age=31536000, immutable"
+
+# Produtos gravados por lote em /produtos/importar
+TAMANHO_LOTE_IMPORTACAO = 500
+
+# Pedidos aceitos por chamada em /pedidos/lote/
+LIMITE_PEDIDOS_LOTE = 500
+
+# Feed SSE: intervalo de reconexão sugerido e de heartbeat
+SSE_RETRY_MS = 3000
+SSE_HEARTBEAT_S = 15
+
 # Dependency para obter a sessão do banco
 def get_db():
     db = SessionLocal()
@@ -37,17 +90,67 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with database.AsyncSessionLocal() as db:
+        yield db
+
+
+# Sessão dos endpoints quentes: AsyncSession com DB_ASYNC, senão a síncrona
+get_sessao = get_async_db if config.DB_ASYNC else get_db
+
+
 
 
 # ---------------------- PRODUTOS ----------------------
 
 @app.post("/produtos/", response_model=List[schemas.ProdutoBase], status_code=status.HTTP_201_CREATED)
 def criar_produtos(produtos: List[schemas.ProdutoCreate], db: Session = Depends(get_db)):
-    return crud.create_produtos(db, produtos)
+    criados = crud.create_produtos(db, produtos)
+    catalogo.cache.invalidar()
+    return criados
+
+@app.post("/produtos/importar", response_model=schemas.ProdutoImportacaoResponse)
+async def importar_produtos(
+    request: Request,
+    atualizar_existentes: bool = True,
+    db: Session = Depends(get_db)
+):
+    """
+    Importa um catálogo grande (CSV, NDJSON ou JSON) em lotes, numa única transação.
+
+    Com `atualizar_existentes` (padrão), produtos com o mesmo nome têm o preço
+    atualizado — útil para reimportar a tabela de preços do fornecedor.
+    """
+    criados = atualizados = 0
+    try:
+        async for lote in importacao.ler_lotes(
+            request.stream(),
+            request.headers.get("content-type", ""),
+            TAMANHO_LOTE_IMPORTACAO
+        ):
+            c, a = await run_in_threadpool(
+                crud.importar_produtos_lote, db, lote, atualizar_existentes
+            )
+            criados += c
+            atualizados += a
+        await run_in_threadpool(crud.concluir_importacao_produtos, db)
+    except importacao.ErroImportacao as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=422, detail=str(e))
+
+    catalogo.cache.invalidar()
+    return {"criados": criados, "atualizados": atualizados}
 
 @app.get("/produtos/", response_model=List[schemas.ProdutoBase])
-def listar_produtos(db: Session = Depends(get_db)):
-    return crud.get_produtos(db)
+async def listar_produtos(
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_sessao)
+):
+    cardapio = await crud_async.get_catalogo(db)
+    headers = {"ETag": cardapio.etag, "Cache-Control": "no-cache"}
+    if etag_confere(if_none_match, cardapio.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cardapio.json, media_type="application/json", headers=headers)
 
 
 
@@ -82,25 +185,54 @@ def criar_mesas_lote(
 
 
 
-@app.get("/mesas/", response_model=List[schemas.MesaBase])
-def listar_mesas(db: Session = Depends(get_db)):
+def _campos_mesa(fields: Optional[str], include_qrcode: bool) -> tuple[str, ...]:
+    """Campos da projeção: `fields=` (lista separada por vírgula) ou id+identificador"""
+    if fields:
+        campos = tuple(dict.fromkeys(c.strip() for c in fields.split(",") if c.strip()))
+        invalidos = [c for c in campos if c not in crud.CAMPOS_MESA]
+        if invalidos or not campos:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Campos inválidos: {', '.join(invalidos) or fields}. Use: {', '.join(crud.CAMPOS_MESA)}"
+            )
+    else:
+        campos = ("id", "identificador")
+    if include_qrcode and "qrcode" not in campos:
+        campos += ("qrcode",)
+    return campos
+
+
+@app.get("/mesas/", response_model=List[schemas.MesaProjecao])
+def listar_mesas(
+    fields: Optional[str] = Query(None, description="Campos separados por vírgula: id, identificador, qrcode"),
+    include_qrcode: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Lista as mesas com id e identificador. O QR Code (Base64) só vem com
+    `include_qrcode=true` ou `fields=...,qrcode`; a imagem tem endpoint
+    próprio (/mesas/{identificador}/qrcode), com cache.
+    """
+    campos = _campos_mesa(fields, include_qrcode)
     try:
-        mesas = crud.get_mesas(db)
-        return mesas
+        # Linhas direto das tuplas, codificadas sem passar pelo Pydantic
+        return serializacao.JSONRapido(crud.get_mesas_linhas(db, campos))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao listar mesas: {str(e)}"
         )
 
-@app.get("/mesas/identificador/{identificador}", response_model=schemas.MesaResponse)
+@app.get("/mesas/identificador/{identificador}", response_model=schemas.MesaProjecao)
 def visualizar_mesa_por_identificador(
     identificador: str,  # Agora recebe o identificador como parâmetro
+    fields: Optional[str] = Query(None, description="Campos separados por vírgula: id, identificador, qrcode"),
+    include_qrcode: bool = False,
     db: Session = Depends(get_db)
 ):
+    campos = _campos_mesa(fields, include_qrcode)
     try:
-        mesa = crud.get_mesa_by_identificador(db, identificador)
-        return mesa
+        return serializacao.JSONRapido(crud.get_mesa_linha(db, identificador, campos))
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -108,82 +240,121 @@ def visualizar_mesa_por_identificador(
         )
 
 
+@app.get("/mesas/qrcodes.zip")
+def exportar_qrcodes(
+    prefixo: Optional[str] = Query(None, max_length=50, description="Só as mesas PREFIXO-N"),
+    de: Optional[int] = Query(None, ge=0, description="Menor N (exige prefixo)"),
+    ate: Optional[int] = Query(None, ge=0, description="Maior N (exige prefixo)"),
+    db: Session = Depends(get_db)
+):
+    """
+    ZIP com o PNG do QR Code de cada mesa, para impressão dos cartões.
+
+    Transmitido enquanto é gerado: as mesas são lidas em lotes, os QR Codes
+    que faltam são renderizados em paralelo e cada PNG vai para a resposta
+    assim que entra no ZIP.
+    """
+    if (de is not None or ate is not None) and not prefixo:
+        raise HTTPException(status_code=422, detail="Os parâmetros de/ate exigem prefixo")
+
+    def arquivos():
+        for lote in crud.iter_qrcodes_mesas(db, prefixo, de, ate):
+            for identificador, png in lote:
+                yield exportacao.nome_arquivo(identificador), png
+
+    nome = exportacao.nome_arquivo(f"qrcodes-{prefixo}" if prefixo else "qrcodes", ".zip")
+    return StreamingResponse(
+        exportacao.zip_streaming(arquivos()),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{nome}"'}
+    )
+
+
 @app.get("/mesas/{identificador}/qrcode")
-def gerar_qrcode(identificador: str, db: Session = Depends(get_db)):
+def gerar_qrcode(
+    identificador: str,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """
-    Endpoint para gerar QR Code da mesa. Agora com armazenamento no banco de dados.
+    Endpoint para gerar QR Code da mesa (PNG).
     
     Fluxo:
-    1. Verifica se a mesa existe
-    2. Se já tem QR code no banco, retorna ele
-    3. Se não tem, gera um novo, salva no banco e retorna
+    1. Se o PNG está no cache (memória/disco), responde sem consultar o banco
+    2. Senão, usa o QR code do banco ou gera, salva e retorna um novo
+    3. ETag forte do conteúdo + If-None-Match → 304
     """
-    mesa = crud.get_mesa_by_identificador(db, identificador)
-    if not mesa:
-        raise HTTPException(status_code=404, detail="Mesa não encontrada")
+    item = qrcodes.cache_png.get(identificador)
+    if item is None:
+        try:
+            png = crud.get_qrcode_png(db, identificador)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Erro ao gerar QR code: {str(e)}"
+            )
+        if png is None:
+            raise HTTPException(status_code=404, detail="Mesa não encontrada")
+        item = qrcodes.cache_png.put(identificador, png)
 
-    # Se já existe QR code armazenado, retorna ele
-    if mesa.qrcode:
-        return StreamingResponse(BytesIO(mesa.qrcode), media_type="image/png")
+    png, etag = item
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL_QRCODE}
+    if etag_confere(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=png, media_type="image/png", headers=headers)
 
-    # Se não existe, gera um novo
-    url = f"https://seuapp.com/welcome/{identificador}"  # Substitua pelo seu domínio real
-    
+
+@app.get("/mesas/{identificador}/conta", response_model=schemas.ContaMesaResponse)
+def visualizar_conta_mesa(identificador: str, db: Session = Depends(get_db)):
+    """Conta aberta da mesa: clientes, pedidos e totais (pedidos RECUSADO não somam)"""
     try:
-        # Gera o QR code
-        img = qrcode.make(url)
-        buf = BytesIO()
-        img.save(buf, format="PNG")
-        qrcode_bytes = buf.getvalue()
-        
-        # Salva no banco de dados
-        mesa.qrcode = qrcode_bytes
-        db.commit()
-        db.refresh(mesa)
-        
-        # Retorna o QR code
-        return StreamingResponse(BytesIO(qrcode_bytes), media_type="image/png")
-    
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erro ao gerar QR code: {str(e)}"
-        )
+        return crud.get_conta_mesa(db, identificador)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@app.post("/mesas/{identificador}/conta/fechar", response_model=schemas.ContaMesaResponse)
+def fechar_conta_mesa(identificador: str, db: Session = Depends(get_db)):
+    """
+    Fecha a conta aberta da mesa e retorna o fechamento.
+    409 se a mesa não tem conta aberta ou se ainda há pedidos PENDENTE.
+    """
+    try:
+        return crud.fechar_conta_mesa(db, identificador)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 
 # ---------------------- CLIENTE - WELCOME ----------------------
 
 @app.post("/welcome", response_model=schemas.ClienteProdutosResponse)
-def welcome_via_qrcode(
+async def welcome_via_qrcode(
     qrcode_base64: str,  # Recebe o QR Code em Base64 diretamente
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_sessao),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
 ):
-    try:
-        # 1. Busca a mesa com o QR Code correspondente
-        mesa = db.query(models.Mesa).filter(
-            models.Mesa.qrcode == qrcode_base64
-        ).first()
+    async def boas_vindas():
+        # Busca a mesa pelo QR Code, cria o cliente e retorna o cardápio em cache
+        resposta = await crud_async.welcome(db, qrcode_base64)
 
-        if not mesa:
+        if not resposta:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="QR Code inválido ou mesa não encontrada"
             )
 
-        # 2. Cria o cliente associado (mantendo seu código original)
-        cliente = crud.create_cliente(db, mesa.identificador)
-
-        # 3. Retorna os produtos (mantendo seu código original)
-        produtos = crud.get_produtos(db)
-        if not produtos:
+        if not resposta["produtos"]:
             raise HTTPException(status_code=404, detail="Nenhum produto cadastrado")
 
-        return {
-            "mesa_identificador": mesa.identificador,
-            "cliente_id": cliente.id,
-            "produtos": produtos
-        }
+        return resposta
+
+    try:
+        # Repetições com a mesma Idempotency-Key não criam outro cliente
+        return await idempotencia.executar(
+            db, "welcome", idempotency_key, qrcode_base64,
+            boas_vindas, schemas.ClienteProdutosResponse
+        )
 
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -194,43 +365,172 @@ def welcome_via_qrcode(
 # ---------------------- PEDIDOS ----------------------
 
 @app.post("/pedidos/", response_model=schemas.PedidoResponse, status_code=status.HTTP_201_CREATED)
-def criar_pedido(pedido: schemas.PedidoCreate, db: Session = Depends(get_db)):
-    for item in pedido.itens:
-        produto = crud.get_produto(db, item.produto_id)
-        if not produto:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Produto com ID {item.produto_id} não encontrado"
-            )
+async def criar_pedido(
+    pedido: schemas.PedidoCreate,
+    db: Session = Depends(get_sessao),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
+):
+    # Repetições com a mesma Idempotency-Key devolvem o pedido já criado
+    return await idempotencia.executar(
+        db, "pedidos", idempotency_key, pedido.model_dump_json(),
+        lambda: crud_async.create_pedido(db, pedido),
+        schemas.PedidoResponse, status.HTTP_201_CREATED
+    )
+
+@app.post("/pedidos/lote/", response_model=List[schemas.PedidoLoteResultado])
+async def criar_pedidos_lote(pedidos: List[schemas.PedidoCreate], db: Session = Depends(get_sessao)):
+    """
+    Recebe os pedidos acumulados offline pelos POS de uma só vez.
 
-    return crud.create_pedido(db, pedido)
+    Cada pedido tem seu próprio resultado: um pedido inválido não impede
+    a criação dos demais.
+    """
+    if len(pedidos) > LIMITE_PEDIDOS_LOTE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo de {LIMITE_PEDIDOS_LOTE} pedidos por lote"
+        )
+    return await crud_async.create_pedidos_lote(db, pedidos)
 
 @app.get("/pedidos/", response_model=List[schemas.PedidoResponse])
-def listar_pedidos(db: Session = Depends(get_db)):
-    pedidos = db.query(models.Pedido).all()
-
-    resposta = []
-    for pedido in pedidos:
-        resposta.append({
-            "id": pedido.id,
-            "cliente_id": pedido.cliente_id,
-            "mesa_identificador": pedido.cliente.mesa.identificador,  # <-- Aqui puxa o identificador da mesa
-            "status": pedido.status,
-            "forma_pagamento": pedido.forma_pagamento,
-            "itens": [
-                {
-                    "produto": {
-                        "id": item.produto.id,
-                        "nome": item.produto.nome,
-                        "preco": item.produto.preco
-                    },
-                    "quantidade": item.quantidade,
-                    "valor_unitario": item.valor_unitario
-                } for item in pedido.itens
-            ]
-        })
-
-    return resposta
+async def listar_pedidos(
+    limite: Optional[int] = Query(None, gt=0, le=1000),
+    apos_id: Optional[int] = None,
+    status_pedido: Optional[str] = Query(None, alias="status"),
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None,
+    db: Session = Depends(get_sessao)
+):
+    """
+    Lista pedidos em ordem de id, com filtros por status e janela de tempo.
+
+    - Sem `limite`: transmite todos os pedidos em lotes (memória constante).
+    - Com `limite`: retorna uma página; use o último id como `apos_id` na próxima.
+    """
+    if status_pedido:
+        _validar_status(status_pedido)
+
+    filtros = {"apos_id": apos_id, "status": status_pedido, "desde": desde, "ate": ate}
+
+    async def lotes():
+        if limite:
+            yield await crud_async.get_pedidos(db, limite=limite, **filtros)
+        else:
+            async for lote in crud_async.iter_pedidos(db, **filtros):
+                yield lote
+
+    async def gerar_json():
+        # Lotes já no formato de PedidoResponse, codificados direto com orjson
+        yield b"["
+        primeiro = True
+        async for lote in lotes():
+            yield (b"" if primeiro else b",") + serializacao.dumps_itens(lote)
+            primeiro = False
+        yield b"]"
+
+    return StreamingResponse(gerar_json(), media_type="application/json")
+
+
+
+@app.get("/pedidos/historico", response_model=List[schemas.PedidoResponse])
+def listar_pedidos_historico(
+    desde: datetime,
+    ate: datetime,
+    limite: int = Query(500, gt=0, le=5000),
+    apos_id: Optional[int] = None,
+    status_pedido: Optional[str] = Query(None, alias="status"),
+    db: Session = Depends(get_db)
+):
+    """
+    Pedidos arquivados (python -m app.arquivamento) criados em [desde, ate),
+    em ordem de id. Para a contabilidade: use o último id como `apos_id` na
+    próxima página.
+    """
+    if status_pedido:
+        _validar_status(status_pedido)
+    pedidos = crud.get_pedidos_historico(
+        db, desde=desde, ate=ate, limite=limite, apos_id=apos_id, status=status_pedido
+    )
+    return serializacao.JSONRapido(pedidos)
+
+
+def _validar_status(status_pedido: str) -> None:
+    if status_pedido.upper() not in models.StatusPedidoEnum:
+        raise HTTPException(status_code=422, detail=f"Status inválido: {status_pedido}")
+
+@app.patch("/pedidos/status", response_model=List[schemas.PedidoStatusResultado])
+async def atualizar_status_pedidos(
+    lote: schemas.PedidosStatusUpdateLote,
+    db: Session = Depends(get_sessao)
+):
+    """Move vários pedidos para o mesmo status com um único UPDATE; resultado por pedido"""
+    _validar_status(lote.status)
+    return await crud_async.atualizar_status_pedidos(db, lote.pedido_ids, lote.status)
+
+@app.patch("/pedidos/{pedido_id}/status", response_model=schemas.PedidoStatusResultado)
+async def atualizar_status_pedido(
+    pedido_id: int,
+    alteracao: schemas.PedidoStatusUpdate,
+    db: Session = Depends(get_sessao)
+):
+    """
+    Altera o status de um pedido (ex.: PENDENTE -> APROVADO).
+
+    Envie a `versao` lida para garantir que ninguém alterou o pedido antes;
+    conflitos e transições inválidas retornam 409 com o estado atual.
+    """
+    _validar_status(alteracao.status)
+    versoes = {pedido_id: alteracao.versao} if alteracao.versao is not None else None
+    resultado = (
+        await crud_async.atualizar_status_pedidos(db, [pedido_id], alteracao.status, versoes)
+    )[0]
+
+    if resultado["resultado"] == "nao_encontrado":
+        raise HTTPException(status_code=404, detail=f"Pedido com ID {pedido_id} não encontrado")
+    if resultado["resultado"] != "atualizado":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=resultado)
+    return resultado
+
+@app.get("/pedidos/eventos")
+async def feed_pedidos(
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    ultimo_id: Optional[str] = None
+):
+    """
+    Feed SSE para as telas do bar/cozinha: eventos `pedido_criado` e `pedido_status`.
+
+    Na reconexão o EventSource envia `Last-Event-ID` (ou use `?ultimo_id=`) e
+    recebe apenas os eventos perdidos. Se não for possível retomar, recebe
+    `reset` e deve recarregar com GET /pedidos/.
+    """
+    assinatura, perdidos = eventos.broadcaster.assinar(last_event_id or ultimo_id)
+
+    async def gerar_eventos():
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            if perdidos is None:
+                yield "event: reset\ndata: {}\n\n"
+            else:
+                for evento in perdidos:
+                    yield evento.formatar()
+
+            # Cliente que sumiu libera a assinatura em até um heartbeat
+            while not assinatura.atrasada and not await request.is_disconnected():
+                try:
+                    evento = await asyncio.wait_for(assinatura.fila.get(), SSE_HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"  # Mantém a conexão viva em proxies/Wi-Fi
+                    continue
+                yield evento.formatar()
+        finally:
+            eventos.broadcaster.cancelar(assinatura)
+
+    return StreamingResponse(
+        gerar_eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 
@@ -239,3 +539,25 @@ def listar_clientes_mesas_valor_total(db: Session = Depends(get_db)):
     return crud.listar_clientes_mesas_valor_total(db)
 
 
+
+
+# ---------------------- MÉTRICAS ----------------------
+
+@app.get("/metricas/pool", response_model=schemas.PoolMetricasResponse)
+def metricas_pool():
+    """Estado do pool de conexões, para dimensionar DB_POOL_SIZE/DB_MAX_OVERFLOW"""
+    return {
+        "sincrono": database.estatisticas_pool(database.engine),
+        "assincrono": database.estatisticas_pool(
+            database.async_engine.sync_engine if database.async_engine else None
+        ),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Métricas no formato de texto do Prometheus"""
+    return PlainTextResponse(
+        metricas.registro.exportar(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
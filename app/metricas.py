@@ -0,0 +1,246 @@
+"""
+Métricas por requisição no formato de texto do Prometheus (GET /metrics).
+
+- `MetricasMiddleware` mede a latência de cada rota e abre um contexto por
+  requisição (contextvar) que acompanha a requisição no threadpool e no
+  modo assíncrono
+- os eventos do SQLAlchemy em `instrumentar_engine` contam consultas e tempo
+  de banco nesse contexto, logam consultas lentas e detectam N+1 (a mesma
+  consulta repetida muitas vezes na mesma requisição)
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import event
+from starlette.routing import Match
+
+from . import config, database
+
+logger = logging.getLogger("bar_api.metricas")
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+# Rótulo das consultas executadas fora de uma requisição (startup, threads)
+FORA_DE_REQUISICAO = "<fora de requisição>"
+
+
+class RequisicaoMetricas:
+    __slots__ = ("metodo", "rota", "consultas", "tempo_db", "formas")
+
+    def __init__(self, metodo: str, rota: str):
+        self.metodo = metodo
+        self.rota = rota
+        self.consultas = 0
+        self.tempo_db = 0.0
+        self.formas: Counter[str] = Counter()
+
+
+_requisicao_atual: contextvars.ContextVar[RequisicaoMetricas | None] = contextvars.ContextVar(
+    "metricas_requisicao", default=None
+)
+
+
+class Histograma:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.contagens = [0] * len(buckets)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        self.soma += valor
+        self.total += 1
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.contagens[i] += 1
+
+
+class Registro:
+    """Métricas agregadas do processo, por (método, rota)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencia: dict[tuple, Histograma] = {}
+        self.consultas: dict[tuple, Histograma] = {}
+        self.tempo_db: dict[tuple, Histograma] = {}
+        self.requisicoes: Counter[tuple] = Counter()
+        self.consultas_lentas: Counter[str] = Counter()
+        self.alertas_n_mais_1: Counter[tuple] = Counter()
+
+    def registrar(self, metodo: str, rota: str, status: int, duracao: float, req: RequisicaoMetricas) -> None:
+        chave = (metodo, rota)
+        with self._lock:
+            self.requisicoes[(metodo, rota, str(status))] += 1
+            self.latencia.setdefault(chave, Histograma(BUCKETS_LATENCIA)).observar(duracao)
+            self.consultas.setdefault(chave, Histograma(BUCKETS_CONSULTAS)).observar(req.consultas)
+            self.tempo_db.setdefault(chave, Histograma(BUCKETS_LATENCIA)).observar(req.tempo_db)
+
+    def registrar_consulta_lenta(self, rota: str) -> None:
+        with self._lock:
+            self.consultas_lentas[rota] += 1
+
+    def registrar_n_mais_1(self, metodo: str, rota: str) -> None:
+        with self._lock:
+            self.alertas_n_mais_1[(metodo, rota)] += 1
+
+    def exportar(self) -> str:
+        linhas: list[str] = []
+        with self._lock:
+            linhas += [
+                "# HELP bar_api_http_requests_total Requisições por rota e status",
+                "# TYPE bar_api_http_requests_total counter",
+            ]
+            for (metodo, rota, status), n in sorted(self.requisicoes.items()):
+                linhas.append(f'bar_api_http_requests_total{{method="{metodo}",route="{rota}",status="{status}"}} {n}')
+
+            for nome, ajuda, dados in (
+                ("bar_api_http_request_duration_seconds", "Latência por rota", self.latencia),
+                ("bar_api_db_queries_per_request", "Consultas SQL por requisição", self.consultas),
+                ("bar_api_db_time_per_request_seconds", "Tempo de banco por requisição", self.tempo_db),
+            ):
+                linhas += [f"# HELP {nome} {ajuda}", f"# TYPE {nome} histogram"]
+                for (metodo, rota), h in sorted(dados.items()):
+                    rotulos = f'method="{metodo}",route="{rota}"'
+                    for limite, n in zip(h.buckets, h.contagens):
+                        linhas.append(f'{nome}_bucket{{{rotulos},le="{limite}"}} {n}')
+                    linhas.append(f'{nome}_bucket{{{rotulos},le="+Inf"}} {h.total}')
+                    linhas.append(f"{nome}_sum{{{rotulos}}} {h.soma}")
+                    linhas.append(f"{nome}_count{{{rotulos}}} {h.total}")
+
+            linhas += [
+                "# HELP bar_api_db_slow_queries_total Consultas acima de METRICAS_SQL_LENTO_MS por rota",
+                "# TYPE bar_api_db_slow_queries_total counter",
+            ]
+            for rota, n in sorted(self.consultas_lentas.items()):
+                linhas.append(f'bar_api_db_slow_queries_total{{route="{rota}"}} {n}')
+            linhas += [
+                "# HELP bar_api_db_n_plus_one_total Requisições com consultas repetidas (N+1)",
+                "# TYPE bar_api_db_n_plus_one_total counter",
+            ]
+            for (metodo, rota), n in sorted(self.alertas_n_mais_1.items()):
+                linhas.append(f'bar_api_db_n_plus_one_total{{method="{metodo}",route="{rota}"}} {n}')
+
+        linhas += _metricas_pool()
+        return "\n".join(linhas) + "\n"
+
+
+def _metricas_pool() -> list[str]:
+    linhas = []
+    for nome_engine, engine_ in (
+        ("sincrono", database.engine),
+        ("assincrono", database.async_engine.sync_engine if database.async_engine else None),
+    ):
+        estatisticas = database.estatisticas_pool(engine_)
+        if not estatisticas or "em_uso" not in estatisticas:
+            continue
+        for chave in ("tamanho", "em_uso", "ociosas", "overflow"):
+            linhas.append(f'bar_api_db_pool_{chave}{{engine="{nome_engine}"}} {estatisticas[chave]}')
+        espera = estatisticas.get("espera")
+        if espera:
+            linhas.append(f'bar_api_db_pool_checkouts_total{{engine="{nome_engine}"}} {espera["checkouts"]}')
+            linhas.append(f'bar_api_db_pool_timeouts_total{{engine="{nome_engine}"}} {espera["timeouts"]}')
+            linhas.append(f'bar_api_db_pool_wait_seconds_total{{engine="{nome_engine}"}} {espera["espera_total_s"]}')
+    return linhas
+
+
+registro = Registro()
+
+
+# -------- SQLAlCHEMY --------
+
+def _antes_de_executar(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metricas_inicio", []).append(time.perf_counter())
+
+
+def _depois_de_executar(conn, cursor, statement, parameters, context, executemany):
+    duracao = time.perf_counter() - conn.info["metricas_inicio"].pop()
+    req = _requisicao_atual.get()
+
+    if duracao * 1000 >= config.METRICAS_SQL_LENTO_MS:
+        rota = req.rota if req is not None else FORA_DE_REQUISICAO
+        registro.registrar_consulta_lenta(rota)
+        logger.warning(
+            "Consulta lenta em %s (%.1f ms): %s",
+            f"{req.metodo} {rota}" if req is not None else rota,
+            duracao * 1000, " ".join(statement.split())[:500]
+        )
+
+    if req is not None:
+        req.consultas += 1
+        req.tempo_db += duracao
+        req.formas[statement] += 1
+
+
+def instrumentar_engine(engine_) -> None:
+    """Registra os eventos de medição no engine (síncrono ou `async_engine.sync_engine`)"""
+    event.listen(engine_, "before_cursor_execute", _antes_de_executar)
+    event.listen(engine_, "after_cursor_execute", _depois_de_executar)
+
+
+# -------- MIDDLEWARE --------
+
+def _resolver_rota(scope) -> str:
+    """
+    Template da rota (ex.: /mesas/{identificador}/conta) resolvido antes da
+    requisição chegar ao roteador, para que as consultas já saibam a rota.
+    Segue a ordem do roteador: o primeiro casamento completo, senão o primeiro
+    parcial (método não permitido).
+    """
+    parcial = None
+    for rota in getattr(getattr(scope.get("app"), "router", None), "routes", ()):
+        casamento, _ = rota.matches(scope)
+        if casamento is Match.FULL:
+            return rota.path
+        if casamento is Match.PARTIAL and parcial is None:
+            parcial = rota.path
+    return parcial or "<sem_rota>"
+
+
+class MetricasMiddleware:
+    """Middleware ASGI puro: funciona com respostas em streaming (o tempo inclui o corpo)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metodo = scope["method"]
+        req = RequisicaoMetricas(metodo, _resolver_rota(scope))
+        token = _requisicao_atual.set(req)
+        status_code = 500
+        inicio = time.perf_counter()
+
+        async def send_com_status(mensagem):
+            nonlocal status_code
+            if mensagem["type"] == "http.response.start":
+                status_code = mensagem["status"]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, send_com_status)
+        finally:
+            duracao = time.perf_counter() - inicio
+            _requisicao_atual.reset(token)
+            registro.registrar(metodo, req.rota, status_code, duracao, req)
+            _verificar_n_mais_1(req)
+
+
+def _verificar_n_mais_1(req: RequisicaoMetricas) -> None:
+    limiar = config.METRICAS_N_MAIS_1_LIMIAR
+    if not limiar or not req.formas:
+        return
+    statement, repeticoes = req.formas.most_common(1)[0]
+    if repeticoes > limiar:
+        registro.registrar_n_mais_1(req.metodo, req.rota)
+        logger.warning(
+            "Possível N+1 em %s %s: consulta repetida %d vezes (%d consultas no total): %s",
+            req.metodo, req.rota, repeticoes, req.consultas, " ".join(statement.split())[:300]
+        )
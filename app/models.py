@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Numeric, Enum, LargeBinary, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Numeric, Enum, LargeBinary, Text, Index
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 from .database import Base
 
@@ -7,24 +7,46 @@ from .database import Base
 StatusPedidoEnum = ("PENDENTE", "APROVADO", "RECUSADO")
 FormaPagamentoEnum = ("PIX", "DEBITO", "CREDITO")
 
+# Transições de status permitidas (origem -> destinos)
+TransicoesStatusPedido = {
+    "PENDENTE": ("APROVADO", "RECUSADO"),
+}
+
 
 class Mesa(Base):
     __tablename__ = "mesas"
     
     id = Column(Integer, primary_key=True)
     identificador = Column(String, unique=True)
-    qrcode = Column(Text)  # Agora como Text (armazena Base64)
+    # Agora como Text (armazena Base64); adiado: só é lido quando acessado ou
+    # pedido explicitamente (load_only), nunca em listagens/lookups comuns
+    qrcode = deferred(Column(Text))
+    qrcode_hash = Column(String(64), unique=True, index=True)  # SHA-256 do Base64, usado no /welcome
     
     clientes = relationship("Cliente", back_populates="mesa", cascade="all, delete")
 
 
 
+class MesaSequencia(Base):
+    """Último número de mesa usado por prefixo (ver crud.reservar_numeros_mesa)"""
+    __tablename__ = "mesa_sequencias"
+
+    prefixo = Column(String(50), primary_key=True)
+    ultimo = Column(Integer, nullable=False, default=0)
+
+
+
 class Cliente(Base):
     __tablename__ = "clientes"
+    __table_args__ = (
+        # Conta aberta da mesa: mesa_id = ? AND conta_fechada_em IS NULL
+        Index("ix_clientes_mesa_id_conta_fechada_em", "mesa_id", "conta_fechada_em"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     mesa_id = Column(Integer, ForeignKey("mesas.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    conta_fechada_em = Column(DateTime, nullable=True)  # NULL = conta aberta
 
     pedidos = relationship("Pedido", back_populates="cliente")
     mesa = relationship("Mesa", back_populates="clientes")
@@ -38,14 +60,34 @@ class Produto(Base):
     preco = Column(Numeric(10, 2), nullable=False)  # 10 dígitos no total, 2 decimais
 
 
+class CatalogoVersao(Base):
+    """Contador único (id=1) incrementado a cada alteração de produtos"""
+    __tablename__ = "catalogo_versao"
+
+    id = Column(Integer, primary_key=True)
+    versao = Column(Integer, nullable=False, default=0)
+
+
 class Pedido(Base):
     __tablename__ = "pedidos"
+    __table_args__ = (
+        # Pedidos de um cliente (totais, conta da mesa) em ordem cronológica
+        Index("ix_pedidos_cliente_id_created_at", "cliente_id", "created_at"),
+        # Fila do bar: pedidos de um status na ordem do cursor (id acompanha created_at)
+        Index("ix_pedidos_status_id", "status", "id"),
+        # Filtro desde/ate sem status
+        Index("ix_pedidos_created_at", "created_at"),
+        # Ids nunca reutilizados: o arquivo (pedidos_historico) guarda os ids originais
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=False)
     status = Column(Enum(*StatusPedidoEnum, name="status_pedido"), default="PENDENTE", nullable=False)
     forma_pagamento = Column(Enum(*FormaPagamentoEnum, name="forma_pagamento"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    versao = Column(Integer, nullable=False, default=1, server_default="1")  # Concorrência otimista
+    valor_total = Column(Numeric(12, 2), nullable=False, default=0, server_default="0")  # Soma dos itens, gravada na criação
 
     cliente = relationship("Cliente", back_populates="pedidos")
     itens = relationship("PedidoItem", back_populates="pedido", cascade="all, delete-orphan")
@@ -53,9 +95,10 @@ class Pedido(Base):
 
 class PedidoItem(Base):
     __tablename__ = "pedido_itens"
+    __table_args__ = {"sqlite_autoincrement": True}  # Ver Pedido.__table_args__
 
     id = Column(Integer, primary_key=True, index=True)
-    pedido_id = Column(Integer, ForeignKey("pedidos.id"), nullable=False)
+    pedido_id = Column(Integer, ForeignKey("pedidos.id"), nullable=False, index=True)
     produto_id = Column(Integer, ForeignKey("produtos.id"), nullable=False)
     quantidade = Column(Integer, nullable=False)
     valor_unitario = Column(Numeric(10, 2), nullable=False)
@@ -63,3 +106,51 @@ class PedidoItem(Base):
     pedido = relationship("Pedido", back_populates="itens")
     produto = relationship("Produto")
 
+
+
+class ClienteTotal(Base):
+    """Total acumulado dos pedidos de cada cliente (mantido por crud.create_pedido)"""
+    __tablename__ = "cliente_totais"
+
+    cliente_id = Column(Integer, ForeignKey("clientes.id"), primary_key=True)
+    valor_total = Column(Numeric(12, 2), nullable=False, default=0)
+
+
+class ChaveIdempotencia(Base):
+    """Resposta registrada para um Idempotency-Key (ver app/idempotencia.py)"""
+    __tablename__ = "chaves_idempotencia"
+
+    escopo = Column(String(32), primary_key=True)  # endpoint, ex.: "pedidos"
+    chave = Column(String(255), primary_key=True)
+    impressao = Column(String(64), nullable=False)  # SHA-256 do payload
+    status_code = Column(Integer)  # NULL enquanto a requisição original processa
+    resposta = Column(Text)  # JSON
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class PedidoHistorico(Base):
+    """Pedidos arquivados (ver app/arquivamento.py); mesmo id do pedido original"""
+    __tablename__ = "pedidos_historico"
+    __table_args__ = (
+        Index("ix_pedidos_historico_cliente_id", "cliente_id"),
+        Index("ix_pedidos_historico_created_at", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=False)
+    status = Column(Enum(*StatusPedidoEnum, name="status_pedido"), nullable=False)
+    forma_pagamento = Column(Enum(*FormaPagamentoEnum, name="forma_pagamento"), nullable=False)
+    created_at = Column(DateTime)
+    versao = Column(Integer, nullable=False, default=1, server_default="1")
+    valor_total = Column(Numeric(12, 2), nullable=False, default=0, server_default="0")
+    arquivado_em = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class PedidoItemHistorico(Base):
+    __tablename__ = "pedido_itens_historico"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    pedido_id = Column(Integer, ForeignKey("pedidos_historico.id"), nullable=False, index=True)
+    produto_id = Column(Integer, ForeignKey("produtos.id"), nullable=False)
+    quantidade = Column(Integer, nullable=False)
+    valor_unitario = Column(Numeric(10, 2), nullable=False)
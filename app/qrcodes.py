@@ -0,0 +1,151 @@
+import base64
+import binascii
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from io import BytesIO
+
+from . import config
+from .cache_http import etag_de
+
+
+# Lotes menores que isso não compensam o custo de despachar para outros processos
+LOTE_MINIMO_PARALELO = 16
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def url_da_mesa(identificador: str) -> str:
+    return f"https://seuapp.com/welcome/{identificador}"
+
+
+def generate_qrcode_png(identificador: str) -> bytes:
+    """Gera o PNG do QR Code da mesa"""
+    # Importado no primeiro uso: qrcode/PIL só são necessários para gerar
+    # QR Codes novos, e deixá-los fora do import acelera a subida dos workers
+    import qrcode
+
+    img = qrcode.make(url_da_mesa(identificador))
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def generate_qrcode_base64(identificador: str) -> str:
+    """Gera QR Code como string Base64"""
+    return base64.b64encode(generate_qrcode_png(identificador)).decode('utf-8')
+
+
+def qrcode_hash(qrcode_base64: str) -> str:
+    """SHA-256 (hex) do QR Code em Base64, indexado em mesas.qrcode_hash"""
+    return hashlib.sha256(qrcode_base64.strip().encode("utf-8")).hexdigest()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Pool de processos compartilhado (criado no primeiro uso)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=config.QRCODE_WORKERS)
+        return _pool
+
+
+def encerrar_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def gerar_lote_base64(identificadores: list[str], executor: Executor | None = None) -> list[str]:
+    """
+    Gera os QR Codes (Base64) de vários identificadores, na mesma ordem.
+
+    Renderização e compressão PNG são CPU-bound, então lotes grandes são
+    distribuídos entre processos (QRCODE_WORKERS).
+    """
+    if executor is None:
+        if len(identificadores) < LOTE_MINIMO_PARALELO or config.QRCODE_WORKERS <= 1:
+            return [generate_qrcode_base64(i) for i in identificadores]
+        executor = get_pool()
+
+    workers = getattr(executor, "_max_workers", 1)
+    chunksize = max(1, len(identificadores) // (workers * 4))
+    return list(executor.map(generate_qrcode_base64, identificadores, chunksize=chunksize))
+
+
+def decodificar_base64(qrcode_base64: str | None) -> bytes | None:
+    """Decodifica o Base64 armazenado; None se vazio ou inválido"""
+    if not qrcode_base64:
+        return None
+    try:
+        return base64.b64decode(qrcode_base64, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+
+class CacheQRCode:
+    """
+    Cache LRU limitado de PNGs por identificador de mesa, com ETag do conteúdo.
+
+    Com `diretorio` definido, os PNGs também ficam em disco e sobrevivem a
+    reinícios (e são compartilhados entre workers).
+    """
+
+    def __init__(self, tamanho: int, diretorio: str | None = None):
+        self.tamanho = tamanho
+        self.diretorio = diretorio
+        self._itens: OrderedDict[str, tuple[bytes, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, identificador: str) -> str:
+        nome = hashlib.sha256(identificador.encode("utf-8")).hexdigest()
+        return os.path.join(self.diretorio, f"{nome}.png")
+
+    def get(self, identificador: str) -> tuple[bytes, str] | None:
+        with self._lock:
+            item = self._itens.get(identificador)
+            if item is not None:
+                self._itens.move_to_end(identificador)
+                return item
+
+        if not self.diretorio:
+            return None
+        try:
+            with open(self._caminho(identificador), "rb") as f:
+                png = f.read()
+        except FileNotFoundError:
+            return None
+        return self._guardar_memoria(identificador, png)
+
+    def put(self, identificador: str, png: bytes) -> tuple[bytes, str]:
+        if self.diretorio:
+            # Escrita atômica: outro worker nunca lê um arquivo pela metade
+            caminho = self._caminho(identificador)
+            temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporario, "wb") as f:
+                f.write(png)
+            os.replace(temporario, caminho)
+        return self._guardar_memoria(identificador, png)
+
+    def _guardar_memoria(self, identificador: str, png: bytes) -> tuple[bytes, str]:
+        item = (png, etag_de(png))
+        with self._lock:
+            self._itens[identificador] = item
+            self._itens.move_to_end(identificador)
+            while len(self._itens) > self.tamanho:
+                self._itens.popitem(last=False)
+        return item
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+
+
+cache_png = CacheQRCode(config.QRCODE_CACHE_TAMANHO, config.QRCODE_CACHE_DIR)
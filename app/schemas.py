@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, field_serializer, model_validator
 from typing import List, Optional
 from decimal import Decimal
+from datetime import datetime
 import base64
 
 
@@ -24,6 +25,12 @@ class MesaResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class MesaProjecao(BaseModel):
+    """Mesa com apenas os campos pedidos em `fields=` (GET /mesas/ e lookup)"""
+    id: Optional[int] = None
+    identificador: Optional[str] = None
+    qrcode: Optional[str] = None  # Só com include_qrcode=true ou fields=...,qrcode
+
 '''
 class MesaCreate(BaseModel):
     identificador: str = Field(..., example="MESA-1")
@@ -31,9 +38,9 @@ class MesaCreate(BaseModel):
     
 
 class MesasCreateLote(BaseModel):
-    quantidade: int = Field(..., gt=0, le=50, example=1)
+    quantidade: int = Field(..., gt=0, le=5000, example=1)
 
-    prefixo: str = Field("M", example="MESA")
+    prefixo: str = Field("M", min_length=1, max_length=50, example="MESA")
 
 
 
@@ -55,6 +62,10 @@ class ProdutoCreate(BaseModel):
     nome: str = Field(..., example="Cerveja Artesanal")
     preco: Decimal = Field(..., gt=0, example=12.50)
 
+class ProdutoImportacaoResponse(BaseModel):
+    criados: int
+    atualizados: int
+
 
 
 
@@ -74,8 +85,12 @@ class PedidoCreate(BaseModel):
 
 class ClienteMesaValorTotalResponse(BaseModel):
     cliente_id: int
-    mesa_id: str
-    valor_total_pedidos: float
+    mesa_id: int
+    valor_total_pedidos: Decimal  # Soma exata; no JSON continua número, como sempre foi
+
+    @field_serializer("valor_total_pedidos")
+    def _valor_total_como_numero(self, valor: Decimal) -> float:
+        return float(valor)
 
     class Config:
         from_attributes = True
@@ -102,6 +117,9 @@ class PedidoResponse(BaseModel):
     mesa_identificador: str  # <-- Aqui é o identificador real, ex: "M-5"
     status: str
     forma_pagamento: str
+    created_at: Optional[datetime] = None
+    versao: Optional[int] = None
+    valor_total: Optional[Decimal] = None  # Soma dos itens, gravada na criação do pedido
     itens: List[PedidoItemResponse]
 
     class Config:
@@ -110,6 +128,53 @@ class PedidoResponse(BaseModel):
 
 
 
+class PedidoStatusUpdate(BaseModel):
+    status: str = Field(..., example="APROVADO")
+    versao: Optional[int] = Field(None, example=1)  # Versão lida pelo cliente (opcional)
+
+class PedidosStatusUpdateLote(BaseModel):
+    pedido_ids: List[int] = Field(..., min_length=1, max_length=500, example=[1, 2, 3])
+    status: str = Field(..., example="APROVADO")
+
+class PedidoStatusResultado(BaseModel):
+    id: int
+    resultado: str  # atualizado, conflito, transicao_invalida ou nao_encontrado
+    status: Optional[str] = None
+    versao: Optional[int] = None
+
+class PedidoLoteResultado(BaseModel):
+    indice: int  # Posição do pedido na lista enviada
+    status: str  # "criado" ou "erro"
+    pedido: Optional[PedidoResponse] = None
+    codigo: Optional[int] = None  # Status HTTP que o pedido receberia em POST /pedidos/
+    erro: Optional[str] = None
+
+
+
+# -------- CONTA DA MESA --------
+
+class ContaPedidoResponse(BaseModel):
+    id: int
+    status: str
+    forma_pagamento: str
+    created_at: Optional[datetime] = None
+    valor_total: Decimal
+
+class ContaClienteResponse(BaseModel):
+    cliente_id: int
+    created_at: Optional[datetime] = None
+    pedidos: List[ContaPedidoResponse]
+    valor_total: Decimal  # Pedidos RECUSADO não entram
+
+class ContaMesaResponse(BaseModel):
+    mesa_identificador: str
+    clientes: List[ContaClienteResponse]
+    valor_total: Decimal
+    fechada_em: Optional[datetime] = None  # Preenchido em /conta/fechar
+
+
+
+
 
 # -------- CLIENTE WELCOME --------
 
@@ -119,3 +184,30 @@ class ClienteProdutosResponse(BaseModel):
     produtos: List[ProdutoBase]
 
 
+
+
+
+# -------- MÉTRICAS --------
+
+class PoolEsperaResponse(BaseModel):
+    checkouts: int
+    timeouts: int
+    espera_total_s: float
+    espera_media_ms: float
+    espera_maxima_ms: float
+
+class PoolEstatisticasResponse(BaseModel):
+    pool: str
+    tamanho: Optional[int] = None
+    max_overflow: Optional[int] = None
+    em_uso: Optional[int] = None
+    ociosas: Optional[int] = None
+    overflow: Optional[int] = None
+    timeout_s: Optional[float] = None
+    recycle_s: Optional[int] = None
+    pre_ping: Optional[bool] = None
+    espera: Optional[PoolEsperaResponse] = None
+
+class PoolMetricasResponse(BaseModel):
+    sincrono: PoolEstatisticasResponse
+    assincrono: Optional[PoolEstatisticasResponse] = None
@@ -0,0 +1,39 @@
+"""
+Serialização JSON das respostas grandes (listas de mesas e pedidos).
+
+O caminho padrão do FastAPI valida cada linha com o `response_model`
+(Pydantic) e depois codifica com o encoder JSON da stdlib; em listas de
+milhares de linhas isso domina o tempo de CPU da requisição. Aqui as linhas
+já chegam como dicts montados a partir das tuplas das consultas e são
+codificadas direto com orjson. O `response_model` continua declarado nos
+endpoints para a documentação OpenAPI.
+
+A saída é a mesma do Pydantic: Decimal vira string com a escala do banco
+("12.50") e datetime vai em ISO 8601.
+"""
+from decimal import Decimal
+
+import orjson
+from fastapi.responses import Response
+
+
+def _padrao(valor):
+    if isinstance(valor, Decimal):
+        return str(valor)
+    raise TypeError(f"Tipo não serializável em JSON: {type(valor).__name__}")
+
+
+def dumps(dados) -> bytes:
+    return orjson.dumps(dados, default=_padrao)
+
+
+def dumps_itens(linhas: list) -> bytes:
+    """Itens de uma lista JSON sem os colchetes, para respostas em streaming"""
+    return dumps(linhas)[1:-1]
+
+
+class JSONRapido(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
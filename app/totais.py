@@ -0,0 +1,47 @@
+"""
+Verificação e reconstrução da tabela cliente_totais.
+
+Uso:
+    python -m app.totais              # lista divergências (código de saída 1 se houver)
+    python -m app.totais --reconstruir
+"""
+import argparse
+import sys
+
+from app import crud
+from app.database import SessionLocal
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Consistência dos totais por cliente")
+    parser.add_argument(
+        "--reconstruir",
+        action="store_true",
+        help="recalcula cliente_totais a partir dos itens dos pedidos"
+    )
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.reconstruir:
+            linhas = crud.reconstruir_totais_clientes(db)
+            print(f"✅ cliente_totais reconstruída ({linhas} clientes)")
+            return 0
+
+        divergencias = crud.verificar_totais_clientes(db)
+        if not divergencias:
+            print("✅ Totais consistentes")
+            return 0
+
+        for d in divergencias:
+            print(
+                f"❌ Cliente {d['cliente_id']}: "
+                f"armazenado={d['armazenado']} calculado={d['calculado']}"
+            )
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
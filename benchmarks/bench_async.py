@@ -0,0 +1,156 @@
+"""
+Benchmark dos caminhos quentes nos modos síncrono e assíncrono (DB_ASYNC).
+
+Sobe o app com uvicorn uma vez por modo, apontando para o mesmo banco, e
+mede requisições/segundo com N clientes concorrentes em:
+  - POST /welcome
+  - POST /pedidos/
+  - GET  /pedidos/?limite=50
+
+Por padrão cria e semeia um SQLite novo a cada execução (um arquivo
+reaproveitado ficaria com o schema antigo depois de uma migração); passe
+--url para medir contra o MySQL de homologação, onde a latência de rede
+é o que diferencia os dois modos. Um cenário com erros aborta o benchmark:
+a vazão dele não seria comparável.
+
+Uso:
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.bench_async --concorrencia 32 --duracao 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+
+def semear(url: str) -> tuple[list[str], list[int], list[int]]:
+    """Garante dados mínimos e retorna (qrcodes, cliente_ids, produto_ids)"""
+    os.environ["DATABASE_URL"] = url
+    from app import database, models
+    from app.qrcodes import generate_qrcode_base64, qrcode_hash
+
+    models.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    try:
+        if not db.query(models.Mesa).filter(models.Mesa.identificador.like("BENCH-%")).first():
+            for i in range(1, 21):
+                qr = generate_qrcode_base64(f"BENCH-{i}")
+                db.add(models.Mesa(identificador=f"BENCH-{i}", qrcode=qr, qrcode_hash=qrcode_hash(qr)))
+            db.add_all(models.Produto(nome=f"Produto {i}", preco=5 + i) for i in range(30))
+            db.flush()
+            mesas = db.query(models.Mesa.id).filter(models.Mesa.identificador.like("BENCH-%")).all()
+            db.add_all(models.Cliente(mesa_id=m.id) for m in mesas for _ in range(5))
+            db.commit()
+
+        qrcodes = [q for (q,) in db.query(models.Mesa.qrcode).filter(
+            models.Mesa.identificador.like("BENCH-%")
+        )]
+        clientes = [c for (c,) in db.query(models.Cliente.id).limit(100)]
+        produtos = [p for (p,) in db.query(models.Produto.id).limit(30)]
+        return qrcodes, clientes, produtos
+    finally:
+        db.close()
+
+
+def subir_servidor(url: str, modo_async: bool, porta: int) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=url, DB_ASYNC="1" if modo_async else "0")
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(porta), "--log-level", "warning"],
+        env=env,
+    )
+    inicio = time.monotonic()
+    while time.monotonic() - inicio < 30:
+        try:
+            httpx.get(f"http://127.0.0.1:{porta}/produtos/", timeout=1)
+            return processo
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    processo.terminate()
+    raise RuntimeError("Servidor não respondeu em 30s")
+
+
+async def carga(base: str, requisicao, concorrencia: int, duracao: float) -> tuple[float, int, int, str | None]:
+    """
+    Dispara `requisicao(client)` em laço por `duracao` segundos; retorna
+    (rps, ok, erros, primeiro erro)
+    """
+    ok = erros = 0
+    primeiro_erro = None
+    fim = time.monotonic() + duracao
+
+    async def trabalhador(client: httpx.AsyncClient):
+        nonlocal ok, erros, primeiro_erro
+        while time.monotonic() < fim:
+            try:
+                resposta = await requisicao(client)
+                if resposta.status_code < 400:
+                    ok += 1
+                    continue
+                erro = f"HTTP {resposta.status_code}: {resposta.text[:200]}"
+            except httpx.HTTPError as e:
+                erro = repr(e)
+            erros += 1
+            primeiro_erro = primeiro_erro or erro
+
+    limites = httpx.Limits(max_connections=concorrencia)
+    async with httpx.AsyncClient(base_url=base, limits=limites, timeout=30) as client:
+        inicio = time.monotonic()
+        await asyncio.gather(*(trabalhador(client) for _ in range(concorrencia)))
+        decorrido = time.monotonic() - inicio
+    return ok / decorrido, ok, erros, primeiro_erro
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="DATABASE_URL (padrão: SQLite temporário)")
+    parser.add_argument("--concorrencia", type=int, default=32)
+    parser.add_argument("--duracao", type=float, default=10.0)
+    parser.add_argument("--porta", type=int, default=8765)
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bar_bench_async_'), 'bench.db')}"
+    qrcodes, clientes, produtos = semear(url)
+
+    cenarios = {
+        "POST /welcome": lambda c: c.post("/welcome", params={"qrcode_base64": random.choice(qrcodes)}),
+        "POST /pedidos/": lambda c: c.post("/pedidos/", json={
+            "cliente_id": random.choice(clientes),
+            "forma_pagamento": "PIX",
+            "itens": [{"produto_id": p, "quantidade": 1} for p in random.sample(produtos, 3)],
+        }),
+        "GET /pedidos/?limite=50": lambda c: c.get("/pedidos/", params={"limite": 50}),
+    }
+
+    resultados = {}
+    for modo_async in (False, True):
+        modo = "async" if modo_async else "sync"
+        processo = subir_servidor(url, modo_async, args.porta)
+        try:
+            for nome, requisicao in cenarios.items():
+                rps, ok, erros, primeiro_erro = asyncio.run(
+                    carga(f"http://127.0.0.1:{args.porta}", requisicao, args.concorrencia, args.duracao)
+                )
+                resultados[(nome, modo)] = rps
+                print(f"[{modo:>5}] {nome:<24} {rps:8.1f} req/s  ({ok} ok, {erros} erros)")
+                if erros:
+                    print(f"❌ {nome} ({modo}) teve erros; o primeiro: {primeiro_erro}")
+                    sys.exit(1)
+        finally:
+            processo.terminate()
+            processo.wait()
+
+    print()
+    print(f"{'endpoint':<24} {'sync':>10} {'async':>10} {'ganho':>8}")
+    for nome in cenarios:
+        sync, assinc = resultados[(nome, "sync")], resultados[(nome, "async")]
+        print(f"{nome:<24} {sync:10.1f} {assinc:10.1f} {assinc / sync if sync else 0:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
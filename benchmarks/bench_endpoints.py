@@ -0,0 +1,267 @@
+"""
+Benchmark reprodutível de todos os endpoints contra um banco local.
+
+1. Semeia (uma vez) um SQLite com dados realistas (ver benchmarks/seed.py)
+2. Copia o banco semeado para um arquivo de trabalho, para que as escritas
+   de uma execução não afetem a próxima
+3. Dispara cada cenário com N clientes concorrentes direto no app ASGI
+4. Reporta latência (p50/p90/p99/máx), vazão, erros e consultas SQL por
+   requisição; com --saida grava tudo em JSON e com --comparar mostra a
+   variação em relação a uma execução anterior (ex.: outro commit)
+
+Uso:
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.bench_endpoints --saida resultado.json
+    python -m benchmarks.bench_endpoints --comparar resultado.json --apenas pedidos
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass
+class Cenario:
+    nome: str
+    requisicao: Callable  # (client, aleatorio, contexto) -> awaitable de httpx.Response
+    requisicoes: int = 200
+    concorrencia: int = 16
+
+
+def _cenarios() -> list[Cenario]:
+    def pedido_aleatorio(a, ctx):
+        return {
+            "cliente_id": a.randint(1, ctx["clientes"]),
+            "forma_pagamento": a.choice(("PIX", "DEBITO", "CREDITO")),
+            "itens": [
+                {"produto_id": p, "quantidade": a.randint(1, 3)}
+                for p in a.sample(range(1, ctx["produtos"] + 1), min(3, ctx["produtos"]))
+            ],
+        }
+
+    lote_mesas = iter(range(1, 1_000_000))
+    return [
+        Cenario("GET /produtos/", lambda c, a, ctx: c.get("/produtos/")),
+        Cenario("POST /produtos/", lambda c, a, ctx: c.post(
+            "/produtos/", json=[{"nome": f"Novo {a.random()}", "preco": "9.90"}]
+        ), requisicoes=50, concorrencia=4),
+        Cenario("POST /produtos/importar", lambda c, a, ctx: c.post(
+            "/produtos/importar",
+            content="nome,preco\n" + "".join(f"Produto {i},{a.randint(5, 90)}.00\n" for i in range(1, 201)),
+            headers={"content-type": "text/csv"},
+        ), requisicoes=20, concorrencia=2),
+        Cenario("GET /mesas/", lambda c, a, ctx: c.get("/mesas/"), requisicoes=50, concorrencia=4),
+        Cenario("GET /mesas/identificador/{id}", lambda c, a, ctx: c.get(
+            f"/mesas/identificador/MESA-{a.randint(1, ctx['mesas'])}"
+        )),
+        Cenario("GET /mesas/{id}/qrcode", lambda c, a, ctx: c.get(
+            f"/mesas/MESA-{a.randint(1, ctx['mesas'])}/qrcode"
+        )),
+        Cenario("POST /mesas/lote/", lambda c, a, ctx: c.post(
+            "/mesas/lote/", json={"quantidade": 10, "prefixo": f"LOTE{next(lote_mesas)}"}
+        ), requisicoes=10, concorrencia=2),
+        Cenario("POST /welcome", lambda c, a, ctx: c.post(
+            "/welcome", params={"qrcode_base64": a.choice(ctx["qrcodes"])}
+        )),
+        Cenario("POST /pedidos/", lambda c, a, ctx: c.post("/pedidos/", json=pedido_aleatorio(a, ctx))),
+        Cenario("POST /pedidos/lote/", lambda c, a, ctx: c.post(
+            "/pedidos/lote/", json=[pedido_aleatorio(a, ctx) for _ in range(25)]
+        ), requisicoes=40, concorrencia=4),
+        Cenario("GET /pedidos/?limite=100", lambda c, a, ctx: c.get(
+            "/pedidos/", params={"limite": 100, "apos_id": a.randint(0, ctx["pedidos"])}
+        )),
+        Cenario("GET /pedidos/?status=PENDENTE", lambda c, a, ctx: c.get(
+            "/pedidos/", params={"status": "PENDENTE", "limite": 100}
+        )),
+        Cenario("GET /pedidos/ (completo)", lambda c, a, ctx: c.get("/pedidos/"),
+                requisicoes=3, concorrencia=1),
+        Cenario("PATCH /pedidos/{id}/status", lambda c, a, ctx: c.patch(
+            f"/pedidos/{a.randint(1, ctx['pedidos'])}/status", json={"status": "APROVADO"}
+        )),
+        Cenario("PATCH /pedidos/status", lambda c, a, ctx: c.patch(
+            "/pedidos/status",
+            json={"pedido_ids": a.sample(range(1, ctx["pedidos"] + 1), 50), "status": "RECUSADO"},
+        ), requisicoes=50, concorrencia=4),
+        Cenario("GET /clientes-mesas-valor-total/", lambda c, a, ctx: c.get("/clientes-mesas-valor-total/"),
+                requisicoes=10, concorrencia=2),
+        Cenario("GET /metricas/pool", lambda c, a, ctx: c.get("/metricas/pool")),
+    ]
+
+
+class ContadorSQL:
+    def __init__(self):
+        self.consultas = 0
+
+    def __call__(self, *args, **kwargs):
+        self.consultas += 1
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p
+    f = int(k)
+    c = min(f + 1, len(ordenados) - 1)
+    return ordenados[f] + (ordenados[c] - ordenados[f]) * (k - f)
+
+
+async def executar_cenario(app, cenario: Cenario, contexto: dict, contador: ContadorSQL, semente: int) -> dict:
+    import httpx
+
+    aleatorio = random.Random(semente)
+    latencias: list[float] = []
+    erros: dict[int, int] = {}
+    restantes = iter(range(cenario.requisicoes))
+
+    async def trabalhador(client):
+        for _ in restantes:
+            inicio = time.perf_counter()
+            resposta = await cenario.requisicao(client, aleatorio, contexto)
+            latencias.append(time.perf_counter() - inicio)
+            if resposta.status_code >= 400:
+                erros[resposta.status_code] = erros.get(resposta.status_code, 0) + 1
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=300) as client:
+        consultas_antes = contador.consultas
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabalhador(client) for _ in range(cenario.concorrencia)))
+        decorrido = time.perf_counter() - inicio
+        consultas = contador.consultas - consultas_antes
+
+    return {
+        "requisicoes": len(latencias),
+        "concorrencia": cenario.concorrencia,
+        "duracao_s": round(decorrido, 4),
+        "vazao_rps": round(len(latencias) / decorrido, 2) if decorrido else 0.0,
+        "latencia_ms": {
+            "p50": round(1000 * _percentil(latencias, 0.50), 3),
+            "p90": round(1000 * _percentil(latencias, 0.90), 3),
+            "p99": round(1000 * _percentil(latencias, 0.99), 3),
+            "max": round(1000 * max(latencias, default=0.0), 3),
+            "media": round(1000 * statistics.fmean(latencias), 3) if latencias else 0.0,
+        },
+        "sql_por_requisicao": round(consultas / len(latencias), 2) if latencias else 0.0,
+        "erros": {str(k): v for k, v in sorted(erros.items())},
+    }
+
+
+def _commit_atual() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _comparar(atual: dict, anterior: dict) -> None:
+    print()
+    print(f"Comparação com {anterior.get('commit') or 'execução anterior'}")
+    print(f"{'cenário':<34} {'p50 antes':>10} {'p50 agora':>10} {'Δ%':>7} {'sql antes':>9} {'sql agora':>9}")
+    for nome, resultado in atual["cenarios"].items():
+        antes = anterior.get("cenarios", {}).get(nome)
+        if not antes:
+            continue
+        p50_antes, p50_agora = antes["latencia_ms"]["p50"], resultado["latencia_ms"]["p50"]
+        delta = 100 * (p50_agora - p50_antes) / p50_antes if p50_antes else 0.0
+        print(
+            f"{nome:<34} {p50_antes:>10.2f} {p50_agora:>10.2f} {delta:>+6.1f}% "
+            f"{antes['sql_por_requisicao']:>9} {resultado['sql_por_requisicao']:>9}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escala", type=float, default=1.0, help="multiplica os volumes do seed")
+    parser.add_argument("--diretorio", default=os.path.join(tempfile.gettempdir(), "bar_bench"))
+    parser.add_argument("--ressemear", action="store_true", help="recria o banco semeado")
+    parser.add_argument("--apenas", default=None, help="roda só cenários cujo nome contém este texto")
+    parser.add_argument("--saida", default=None, help="arquivo JSON com os resultados")
+    parser.add_argument("--comparar", default=None, help="JSON de uma execução anterior")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    os.makedirs(args.diretorio, exist_ok=True)
+    semeado = os.path.join(args.diretorio, f"semeado_{args.escala:g}.db")
+    trabalho = os.path.join(args.diretorio, "trabalho.db")
+
+    if args.ressemear or not os.path.exists(semeado):
+        if os.path.exists(semeado):
+            os.remove(semeado)
+        # Processo separado: o app deste processo deve abrir só o arquivo de trabalho
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.seed", "--url", f"sqlite:///{semeado}",
+             "--escala", str(args.escala), "--semente", str(args.semente)],
+            check=True,
+        )
+
+    shutil.copyfile(semeado, trabalho)
+    os.environ["DATABASE_URL"] = f"sqlite:///{trabalho}"
+
+    from sqlalchemy import event
+    from app import config, database, models
+    from app.main import app
+
+    contador = ContadorSQL()
+    event.listen(database.engine, "before_cursor_execute", contador)
+    if database.async_engine is not None:
+        event.listen(database.async_engine.sync_engine, "before_cursor_execute", contador)
+
+    db = database.SessionLocal()
+    try:
+        contagens = {
+            "mesas": db.query(models.Mesa).count(),
+            "clientes": db.query(models.Cliente).count(),
+            "produtos": db.query(models.Produto).count(),
+            "pedidos": db.query(models.Pedido).count(),
+            "pedido_itens": db.query(models.PedidoItem).count(),
+        }
+        qrcodes = [q for (q,) in db.query(models.Mesa.qrcode).limit(200)]
+    finally:
+        db.close()
+    contexto = {**contagens, "qrcodes": qrcodes}
+
+    resultados = {}
+    print(f"{'cenário':<34} {'req':>5} {'rps':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'sql/req':>8} erros")
+    for indice, cenario in enumerate(_cenarios()):
+        if args.apenas and args.apenas.lower() not in cenario.nome.lower():
+            continue
+        resultado = asyncio.run(executar_cenario(app, cenario, contexto, contador, args.semente + indice))
+        resultados[cenario.nome] = resultado
+        lat = resultado["latencia_ms"]
+        print(
+            f"{cenario.nome:<34} {resultado['requisicoes']:>5} {resultado['vazao_rps']:>8.1f} "
+            f"{lat['p50']:>9.2f} {lat['p90']:>9.2f} {lat['p99']:>9.2f} "
+            f"{resultado['sql_por_requisicao']:>8} {resultado['erros'] or ''}"
+        )
+
+    saida = {
+        "commit": _commit_atual(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "escala": args.escala,
+        "volumes": contagens,
+        "db_async": config.DB_ASYNC,
+        "cenarios": resultados,
+    }
+    if args.saida:
+        with open(args.saida, "w") as f:
+            json.dump(saida, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados gravados em {args.saida}")
+    if args.comparar:
+        with open(args.comparar) as f:
+            _comparar(saida, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark do tempo de subida de um worker.
+
+Cada medição roda em um processo novo (como um worker recém-criado num
+deploy) e separa:
+- import: `import app.main`
+- aquecimento: lifespan de startup (pool + cardápio)
+- 1ª requisição: GET /produtos/ logo após a subida
+Também informa se qrcode/PIL foram carregados no import.
+
+Uso:
+    python -m benchmarks.bench_inicializacao
+    python -m benchmarks.bench_inicializacao --url mysql+mysqlconnector://... --repeticoes 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+_FILHO = r"""
+import asyncio, json, sys, time
+inicio = time.perf_counter()
+import app.main
+importado = time.perf_counter()
+pesados = sorted(m for m in ("qrcode", "PIL") if m in sys.modules)
+
+import httpx
+
+async def subir():
+    app_ = app.main.app
+    async with app_.router.lifespan_context(app_):
+        aquecido = time.perf_counter()
+        transporte = httpx.ASGITransport(app=app_)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as client:
+            resposta = await client.get("/produtos/")
+            resposta.raise_for_status()
+        return aquecido, time.perf_counter()
+
+aquecido, respondido = asyncio.run(subir())
+print(json.dumps({
+    "import": importado - inicio,
+    "aquecimento": aquecido - importado,
+    "primeira_requisicao": respondido - aquecido,
+    "total": respondido - inicio,
+    "pesados": pesados,
+}))
+"""
+
+
+def medir(url: str, modo_async: bool) -> dict:
+    env = dict(os.environ, DATABASE_URL=url, DB_ASYNC="1" if modo_async else "0")
+    saida = subprocess.run(
+        [sys.executable, "-c", _FILHO], env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="DATABASE_URL de um banco já criado (padrão: SQLite temporário)")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--async", dest="modo_async", action="store_true", help="sobe com DB_ASYNC=1")
+    args = parser.parse_args()
+
+    url = args.url
+    if url is None:
+        caminho = os.path.join(tempfile.mkdtemp(prefix="bar_bench_inicio_"), "bench.db")
+        url = f"sqlite:///{caminho}"
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.seed", "--url", url, "--escala", "0.05"],
+            check=True, capture_output=True,
+        )
+
+    medicoes = [medir(url, args.modo_async) for _ in range(args.repeticoes)]
+
+    print(f"{'etapa':<22} {'mediana ms':>11} {'mín ms':>8} {'máx ms':>8}")
+    for etapa in ("import", "aquecimento", "primeira_requisicao", "total"):
+        valores = [m[etapa] * 1000 for m in medicoes]
+        print(f"{etapa:<22} {statistics.median(valores):>11.1f} {min(valores):>8.1f} {max(valores):>8.1f}")
+    pesados = medicoes[0]["pesados"]
+    print(f"\nMódulos de imagem carregados no import: {', '.join(pesados) if pesados else 'nenhum'}")
+
+
+if __name__ == "__main__":
+    main()
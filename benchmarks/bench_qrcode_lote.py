@@ -0,0 +1,56 @@
+"""
+Benchmark da geração de QR Codes em lote (app.qrcodes.gerar_lote_base64).
+
+Mede o tempo de parede para renderizar N QR Codes com 1, 2, 4, ... processos.
+
+Uso:
+    python -m benchmarks.bench_qrcode_lote --quantidade 500
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.qrcodes import gerar_lote_base64
+
+
+def medir(identificadores: list[str], workers: int) -> float:
+    if workers == 1:
+        gerar_lote_base64(identificadores[:1])  # aquece o import do PIL
+        inicio = time.perf_counter()
+        gerar_lote_base64(identificadores)
+        return time.perf_counter() - inicio
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Sobe os processos antes de medir
+        gerar_lote_base64(identificadores[:workers], executor=executor)
+        inicio = time.perf_counter()
+        gerar_lote_base64(identificadores, executor=executor)
+        return time.perf_counter() - inicio
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quantidade", type=int, default=500)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    identificadores = [f"BENCH-{i}" for i in range(1, args.quantidade + 1)]
+
+    workers_testados = []
+    w = 1
+    while w < args.max_workers:
+        workers_testados.append(w)
+        w *= 2
+    workers_testados.append(args.max_workers)
+
+    base = None
+    print(f"{'workers':>8} {'segundos':>10} {'qr/s':>10} {'speedup':>8}")
+    for workers in workers_testados:
+        segundos = medir(identificadores, workers)
+        base = base or segundos
+        print(f"{workers:>8} {segundos:>10.3f} {args.quantidade / segundos:>10.1f} {base / segundos:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark do caminho de serialização das listas grandes (GET /mesas/ e GET /pedidos/).
+
+Compara, para 1k/10k/100k linhas, o caminho anterior (objetos do ORM
+validados pelo `response_model` do Pydantic e codificados com json/pydantic)
+com o caminho atual (dicts montados das tuplas + orjson, app/serializacao.py).
+Mede consulta + montagem + codificação e confere que os dois produzem o mesmo
+JSON.
+
+Uso:
+    python -m benchmarks.bench_serializacao
+    python -m benchmarks.bench_serializacao --tamanhos 1000 10000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+
+def _semear(url: str, linhas: int) -> None:
+    from sqlalchemy import create_engine, insert
+    from app import models
+
+    def preco(produto_id: int) -> Decimal:
+        return Decimal(500 + produto_id * 37) / 100
+
+    engine = create_engine(url)
+    models.Base.metadata.create_all(bind=engine)
+    qrcode = "iVBORw0KGgo" + "A" * 1100  # tamanho típico do Base64 de um QR Code
+    inicio = datetime(2026, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Mesa.__table__), [
+            {"id": i, "identificador": f"MESA-{i}", "qrcode": qrcode} for i in range(1, linhas + 1)
+        ])
+        conn.execute(insert(models.Produto.__table__), [
+            {"id": i, "nome": f"Produto {i}", "preco": preco(i)} for i in range(1, 51)
+        ])
+        conn.execute(insert(models.Cliente.__table__), [
+            {"id": i, "mesa_id": i} for i in range(1, linhas + 1)
+        ])
+        conn.execute(insert(models.Pedido.__table__), [
+            {"id": i, "cliente_id": i, "status": "PENDENTE", "forma_pagamento": "PIX",
+             "created_at": inicio + timedelta(seconds=i), "versao": 1,
+             "valor_total": sum(preco((i + j) % 50 + 1) * (j + 1) for j in range(3))}
+            for i in range(1, linhas + 1)
+        ])
+        conn.execute(insert(models.PedidoItem.__table__), [
+            {"pedido_id": i, "produto_id": (i + j) % 50 + 1, "quantidade": j + 1,
+             "valor_unitario": preco((i + j) % 50 + 1)}
+            for i in range(1, linhas + 1) for j in range(3)
+        ])
+    engine.dispose()
+
+
+def _mesas_anterior(db) -> bytes:
+    from pydantic import TypeAdapter
+    from app import crud, schemas
+
+    adapter = TypeAdapter(List[schemas.MesaBase])
+    validadas = adapter.validate_python(crud.get_mesas(db), from_attributes=True)
+    return json.dumps(adapter.dump_python(validadas, mode="json"), separators=(",", ":")).encode()
+
+
+def _mesas_atual(db) -> bytes:
+    from app import crud, serializacao
+    return serializacao.dumps(crud.get_mesas_linhas(db))
+
+
+def _pedidos_anterior(db) -> bytes:
+    """GET /pedidos/ antes: ORM com selectinload + model_validate/model_dump_json por linha"""
+    from sqlalchemy.orm import selectinload
+    from app import models, schemas
+
+    linhas = (
+        db.query(models.Pedido, models.Mesa.identificador)
+        .join(models.Cliente, models.Pedido.cliente_id == models.Cliente.id)
+        .join(models.Mesa, models.Cliente.mesa_id == models.Mesa.id)
+        .options(selectinload(models.Pedido.itens).joinedload(models.PedidoItem.produto))
+        .order_by(models.Pedido.id)
+        .all()
+    )
+    partes = []
+    for pedido, mesa_identificador in linhas:
+        dados = {
+            "id": pedido.id,
+            "cliente_id": pedido.cliente_id,
+            "mesa_identificador": mesa_identificador,
+            "status": pedido.status,
+            "forma_pagamento": pedido.forma_pagamento,
+            "created_at": pedido.created_at,
+            "versao": pedido.versao,
+            "valor_total": pedido.valor_total,
+            "itens": [
+                {
+                    "produto": {"id": i.produto.id, "nome": i.produto.nome, "preco": i.produto.preco},
+                    "quantidade": i.quantidade,
+                    "valor_unitario": i.valor_unitario,
+                }
+                for i in pedido.itens
+            ],
+        }
+        partes.append(schemas.PedidoResponse.model_validate(dados).model_dump_json())
+    return ("[" + ",".join(partes) + "]").encode()
+
+
+def _pedidos_atual(db) -> bytes:
+    from app import crud, serializacao
+    return serializacao.dumps(crud.get_pedidos(db, limite=10**9))
+
+
+def _medir(fn, sessao_local, repeticoes: int) -> tuple[float, bytes]:
+    melhor, saida = float("inf"), b""
+    for _ in range(repeticoes):
+        db = sessao_local()
+        try:
+            inicio = time.perf_counter()
+            saida = fn(db)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        finally:
+            db.close()
+    return melhor, saida
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeticoes", type=int, default=3, help="usa o melhor tempo de N execuções")
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp(prefix="bar_bench_serializacao_")
+    casos = [("GET /mesas/", _mesas_anterior, _mesas_atual), ("GET /pedidos/", _pedidos_anterior, _pedidos_atual)]
+
+    print(f"{'endpoint':<14} {'linhas':>8} {'anterior s':>11} {'atual s':>9} {'speedup':>8} {'MB':>7}")
+    for tamanho in args.tamanhos:
+        url = f"sqlite:///{os.path.join(diretorio, f'{tamanho}.db')}"
+        _semear(url, tamanho)
+
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        engine = create_engine(url)
+        sessao_local = sessionmaker(bind=engine)
+
+        for nome, anterior, atual in casos:
+            t_anterior, saida_anterior = _medir(anterior, sessao_local, args.repeticoes)
+            t_atual, saida_atual = _medir(atual, sessao_local, args.repeticoes)
+            if json.loads(saida_anterior) != json.loads(saida_atual):
+                raise SystemExit(f"❌ {nome}: os dois caminhos produziram JSON diferente")
+            print(f"{nome:<14} {tamanho:>8} {t_anterior:>11.3f} {t_atual:>9.3f} "
+                  f"{t_anterior / t_atual:>7.1f}x {len(saida_atual) / 1e6:>7.1f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
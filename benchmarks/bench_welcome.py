@@ -0,0 +1,111 @@
+"""
+Benchmark da "tempestade" de leituras de QR Code no POST /welcome.
+
+Simula rajadas de N clientes lendo o QR Code ao mesmo tempo e compara o
+caminho com um commit por leitura (WELCOME_AGRUPAMENTO_MS=0) com o
+agrupado (padrão). Cada modo roda em um processo novo, com o app ASGI
+em processo; conta os commits no banco e mede a latência de cada leitura.
+
+Uso:
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.bench_welcome --rajadas 20 --tamanho 50
+    python -m benchmarks.bench_welcome --url mysql+mysqlconnector://...  # banco já semeado
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+_FILHO = r"""
+import asyncio, json, random, statistics, sys, time
+import httpx
+from sqlalchemy import event
+from app import database, models
+from app.main import app
+
+rajadas, tamanho = int(sys.argv[1]), int(sys.argv[2])
+commits = 0
+def contar(_conn):
+    global commits
+    commits += 1
+for engine_ in filter(None, (database.engine, database.async_engine and database.async_engine.sync_engine)):
+    event.listen(engine_, "commit", contar)
+
+db = database.SessionLocal()
+qrcodes = [q for (q,) in db.query(models.Mesa.qrcode).filter(models.Mesa.qrcode.isnot(None)).limit(200)]
+db.close()
+
+async def main():
+    latencias = []
+    async with app.router.lifespan_context(app):
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=60) as client:
+            async def leitura():
+                inicio = time.perf_counter()
+                r = await client.post("/welcome", params={"qrcode_base64": random.choice(qrcodes)})
+                r.raise_for_status()
+                latencias.append(time.perf_counter() - inicio)
+
+            global commits
+            await leitura()  # aquece cardápio/threads
+            commits, latencias[:] = 0, []
+            inicio = time.perf_counter()
+            for _ in range(rajadas):
+                await asyncio.gather(*(leitura() for _ in range(tamanho)))
+            decorrido = time.perf_counter() - inicio
+    latencias.sort()
+    print(json.dumps({
+        "leituras": len(latencias),
+        "commits": commits,
+        "leituras_por_s": len(latencias) / decorrido,
+        "p50_ms": statistics.median(latencias) * 1000,
+        "p99_ms": latencias[int(len(latencias) * 0.99) - 1] * 1000,
+    }))
+
+asyncio.run(main())
+"""
+
+
+def medir(url: str, agrupamento_ms: float, rajadas: int, tamanho: int, modo_async: bool) -> dict:
+    env = dict(
+        os.environ,
+        DATABASE_URL=url,
+        DB_ASYNC="1" if modo_async else "0",
+        WELCOME_AGRUPAMENTO_MS=str(agrupamento_ms),
+    )
+    saida = subprocess.run(
+        [sys.executable, "-c", _FILHO, str(rajadas), str(tamanho)],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="DATABASE_URL de um banco já semeado (padrão: SQLite temporário)")
+    parser.add_argument("--rajadas", type=int, default=20)
+    parser.add_argument("--tamanho", type=int, default=50, help="leituras simultâneas por rajada")
+    parser.add_argument("--agrupamento-ms", type=float, default=5.0)
+    parser.add_argument("--async", dest="modo_async", action="store_true", help="sobe com DB_ASYNC=1")
+    args = parser.parse_args()
+
+    url = args.url
+    if url is None:
+        caminho = os.path.join(tempfile.mkdtemp(prefix="bar_bench_welcome_"), "bench.db")
+        url = f"sqlite:///{caminho}"
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.seed", "--url", url, "--escala", "0.1"],
+            check=True, capture_output=True,
+        )
+
+    print(f"{'modo':<22} {'leituras':>8} {'commits':>8} {'leit./commit':>12} {'leit./s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for nome, janela in (("um commit por leitura", 0), (f"agrupado ({args.agrupamento_ms:g} ms)", args.agrupamento_ms)):
+        r = medir(url, janela, args.rajadas, args.tamanho, args.modo_async)
+        print(f"{nome:<22} {r['leituras']:>8} {r['commits']:>8} {r['leituras'] / max(r['commits'], 1):>12.1f} "
+              f"{r['leituras_por_s']:>9.0f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
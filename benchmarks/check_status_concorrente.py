@@ -0,0 +1,75 @@
+"""
+Verifica a aprovação concorrente de um mesmo pedido (PATCH /pedidos/status).
+
+Dois bartenders leem o pedido PENDENTE na versão 1 e aprovam ao mesmo tempo:
+o segundo só executa o UPDATE depois que o primeiro já gravou e fez commit.
+Exatamente um deve receber "atualizado" e o outro "conflito", com um único
+evento pedido_status publicado. Sai com código 1 caso contrário.
+
+Uso:
+    python -m benchmarks.check_status_concorrente                  # SQLite temporário
+    python -m benchmarks.check_status_concorrente --url mysql+mysqlconnector://...  # banco de teste vazio
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="DATABASE_URL de um banco de teste (padrão: SQLite temporário)")
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bar_check_status_'), 'check.db')}"
+    os.environ["DATABASE_URL"] = url
+
+    from sqlalchemy import event
+    from app import crud, database, models
+
+    models.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    mesa = models.Mesa(identificador="CHECK-STATUS-1")
+    cliente = models.Cliente(mesa=mesa)
+    pedido = models.Pedido(cliente=cliente, forma_pagamento="PIX", status="PENDENTE", versao=1)
+    db.add(pedido)
+    db.commit()
+    pedido_id = pedido.id
+    db.close()
+
+    publicados = []
+    publicar_original = crud.eventos.publicar
+    crud.eventos.publicar = lambda tipo, dados: publicados.append((tipo, dados))
+
+    resultados = []
+    primeiro_executado = []
+    segundo = database.SessionLocal()
+
+    def aprovar_primeiro(conn, cursor, statement, parameters, context, executemany):
+        # O segundo bartender já leu o pedido; antes do UPDATE dele, o primeiro aprova e faz commit
+        if statement.lstrip().upper().startswith("UPDATE") and not primeiro_executado:
+            primeiro_executado.append(True)
+            primeiro = database.SessionLocal()
+            try:
+                resultados.append(crud.update_pedido_status(primeiro, pedido_id, "APROVADO"))
+            finally:
+                primeiro.close()
+
+    event.listen(database.engine, "before_cursor_execute", aprovar_primeiro)
+    try:
+        resultados.append(crud.update_pedido_status(segundo, pedido_id, "APROVADO"))
+    finally:
+        event.remove(database.engine, "before_cursor_execute", aprovar_primeiro)
+        segundo.close()
+        crud.eventos.publicar = publicar_original
+
+    obtidos = sorted(r["resultado"] for r in resultados)
+    print(f"resultados: {obtidos}; eventos pedido_status: {len(publicados)}")
+    if obtidos != ["atualizado", "conflito"] or len(publicados) != 1:
+        print("❌ A aprovação concorrente deveria ter exatamente um vencedor")
+        sys.exit(1)
+    print("✅ Um bartender aprovou, o outro recebeu conflito")
+
+
+if __name__ == "__main__":
+    main()
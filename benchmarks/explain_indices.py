@@ -0,0 +1,198 @@
+"""
+Verifica os planos de execução das consultas quentes da API.
+
+Executa as funções do crud contra um banco semeado, captura cada SELECT que
+elas emitem e roda EXPLAIN (MySQL) / EXPLAIN QUERY PLAN (SQLite) sobre ele.
+Sai com código 1 se alguma consulta fizer varredura completa de uma tabela
+que deveria ser acessada por índice — serve como checagem de regressão
+quando um índice some ou uma consulta muda de forma.
+
+Uso:
+    python -m benchmarks.explain_indices                 # SQLite semeado em /tmp
+    python -m benchmarks.explain_indices --url mysql+mysqlconnector://...  # banco já semeado
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from typing import Callable
+
+
+@dataclass
+class Consulta:
+    nome: str
+    executar: Callable  # (db, contexto) -> qualquer coisa; só os SELECTs emitidos importam
+    # Tabelas que podem ser varridas por inteiro (listagens completas, agregações)
+    varredura_permitida: set[str] = field(default_factory=set)
+
+
+def _consultas() -> list[Consulta]:
+    from sqlalchemy import select
+    from app import crud, models
+
+    def pedidos_do_cliente(db, ctx):
+        return db.execute(
+            select(models.Pedido.id, models.Pedido.status)
+            .where(models.Pedido.cliente_id == ctx["cliente_id"])
+            .order_by(models.Pedido.created_at)
+        ).all()
+
+    def clientes_da_mesa(db, ctx):
+        return db.execute(
+            select(models.Cliente.id).where(models.Cliente.mesa_id == ctx["mesa_id"])
+        ).all()
+
+    return [
+        Consulta("GET /pedidos/ (página seguinte)", lambda db, ctx: crud.get_pedidos(db, apos_id=ctx["pedido_id"])),
+        Consulta("GET /pedidos/?status=PENDENTE", lambda db, ctx: crud.get_pedidos(db, status="PENDENTE", desde=ctx["desde"])),
+        Consulta("GET /pedidos/?desde=&ate=", lambda db, ctx: crud.get_pedidos(db, desde=ctx["desde"], ate=ctx["ate"])),
+        Consulta("GET /pedidos/historico", lambda db, ctx: crud.get_pedidos_historico(db, ctx["desde_arquivo"], ctx["ate_arquivo"])),
+        Consulta("POST /welcome (mesa por QR code)", lambda db, ctx: crud.get_mesa_by_qrcode(db, ctx["qrcode"])),
+        Consulta("GET /mesas/identificador/{id}", lambda db, ctx: crud.get_mesa_by_identificador(db, ctx["identificador"])),
+        Consulta("POST /pedidos/ (mesas dos clientes)", lambda db, ctx: crud.get_mesas_por_clientes(db, [ctx["cliente_id"]])),
+        Consulta("POST /pedidos/ (produtos do pedido)", lambda db, ctx: crud.get_produtos_por_ids(db, [1, 2, 3])),
+        Consulta("GET /mesas/{id}/conta", lambda db, ctx: crud.get_conta_mesa(db, ctx["identificador"])),
+        Consulta("pedidos de um cliente", pedidos_do_cliente),
+        Consulta("clientes de uma mesa", clientes_da_mesa),
+        Consulta(
+            "GET /clientes-mesas-valor-total/",
+            lambda db, ctx: crud.listar_clientes_mesas_valor_total(db),
+            # Relatório de todos os clientes: a varredura de clientes é o próprio resultado
+            varredura_permitida={"clientes", "cliente_totais"},
+        ),
+    ]
+
+
+def _varreduras_sqlite(conn, sql, parametros) -> tuple[list[str], list[str]]:
+    plano = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, parametros).all()
+    linhas = [detalhe for *_, detalhe in plano]
+    tabelas = []
+    for detalhe in linhas:
+        # "SCAN pedidos" / "SCAN pedidos USING INDEX ..." percorrem a tabela
+        # inteira; "SEARCH ..." usa índice ou chave primária
+        achado = re.match(r"SCAN (\w+)", detalhe)
+        if achado:
+            tabelas.append(achado.group(1))
+    return tabelas, linhas
+
+
+def _varreduras_mysql(conn, sql, parametros) -> tuple[list[str], list[str]]:
+    resultado = conn.exec_driver_sql("EXPLAIN " + sql, parametros)
+    linhas = [dict(zip(resultado.keys(), linha)) for linha in resultado.all()]
+    # type=ALL é varredura da tabela, type=index é varredura completa de um índice
+    tabelas = [l["table"] for l in linhas if l.get("type") in ("ALL", "index") and l.get("table")]
+    return tabelas, [f"{l.get('table')}: type={l.get('type')} key={l.get('key')} rows={l.get('rows')}" for l in linhas]
+
+
+def _sem_alias(tabela: str) -> str:
+    # SQLAlchemy usa aliases como "pedidos_1" em eager loads
+    return re.sub(r"_\d+$", "", tabela)
+
+
+def verificar(database, consultas: list[Consulta], contexto: dict, detalhar: bool = False) -> list[str]:
+    from sqlalchemy import event
+
+    dialeto = database.engine.dialect.name
+    varreduras = _varreduras_mysql if dialeto == "mysql" else _varreduras_sqlite
+    falhas = []
+
+    for consulta in consultas:
+        capturadas = []
+
+        def capturar(conn, cursor, statement, parameters, context, executemany):
+            if not executemany and statement.lstrip().upper().startswith("SELECT"):
+                capturadas.append((statement, parameters))
+
+        event.listen(database.engine, "before_cursor_execute", capturar)
+        db = database.SessionLocal()
+        try:
+            consulta.executar(db, contexto)
+        finally:
+            db.close()
+            event.remove(database.engine, "before_cursor_execute", capturar)
+
+        with database.engine.connect() as conn:
+            for sql, parametros in capturadas:
+                tabelas, plano = varreduras(conn, sql, parametros)
+                proibidas = sorted({t for t in tabelas if _sem_alias(t) not in consulta.varredura_permitida})
+                situacao = "❌" if proibidas else "✅"
+                print(f"{situacao} {consulta.nome}")
+                if proibidas or detalhar:
+                    print("   " + " ".join(sql.split())[:200])
+                    for linha in plano:
+                        print(f"     {linha}")
+                if proibidas:
+                    falhas.append(f"{consulta.nome}: varredura completa em {', '.join(proibidas)}")
+    return falhas
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="banco já semeado; sem isso usa um SQLite temporário")
+    parser.add_argument("--escala", type=float, default=0.2, help="escala do seed do SQLite temporário")
+    parser.add_argument("--detalhar", action="store_true", help="mostra o plano de todas as consultas")
+    args = parser.parse_args()
+
+    url = args.url
+    semear = url is None
+    if semear:
+        caminho = os.path.join(tempfile.gettempdir(), "bar_bench", f"explain_{args.escala:g}.db")
+        if not os.path.exists(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.seed", "--url", f"sqlite:///{caminho}", "--escala", str(args.escala)],
+                check=True,
+            )
+        else:
+            semear = False
+        url = f"sqlite:///{caminho}"
+    os.environ["DATABASE_URL"] = url
+
+    from sqlalchemy import func
+    from app import arquivamento, database, models
+
+    db = database.SessionLocal()
+    try:
+        if semear:
+            # Arquiva o primeiro terço do período para o arquivo ter dados
+            primeiro, ultimo = db.query(func.min(models.Pedido.created_at), func.max(models.Pedido.created_at)).one()
+            arquivamento.arquivar_pedidos(db, primeiro + (ultimo - primeiro) / 3)
+        if database.engine.dialect.name == "sqlite":
+            # Sem estatísticas o planejador do SQLite ignora índices pouco seletivos
+            db.connection().exec_driver_sql("ANALYZE")
+            db.commit()
+        mesa = db.query(models.Mesa.id, models.Mesa.identificador, models.Mesa.qrcode).first()
+        primeiro, ultimo = db.query(func.min(models.Pedido.created_at), func.max(models.Pedido.created_at)).one()
+        primeiro_arquivo, ultimo_arquivo = db.query(
+            func.min(models.PedidoHistorico.created_at), func.max(models.PedidoHistorico.created_at)
+        ).one()
+        if primeiro_arquivo is None:  # arquivo vazio: consulta a mesma janela das tabelas quentes
+            primeiro_arquivo, ultimo_arquivo = primeiro, ultimo
+        contexto = {
+            "mesa_id": mesa.id,
+            "identificador": mesa.identificador,
+            "qrcode": mesa.qrcode,
+            "cliente_id": db.query(func.min(models.Cliente.id)).scalar(),
+            "pedido_id": db.query(func.max(models.Pedido.id)).scalar() - 100,
+            "desde": ultimo - (ultimo - primeiro) / 30,
+            "ate": ultimo,
+            "desde_arquivo": ultimo_arquivo - (ultimo_arquivo - primeiro_arquivo) / 30,
+            "ate_arquivo": ultimo_arquivo,
+        }
+    finally:
+        db.close()
+
+    falhas = verificar(database, _consultas(), contexto, args.detalhar)
+    if falhas:
+        print("\nConsultas sem índice adequado:")
+        for falha in falhas:
+            print(f" - {falha}")
+        sys.exit(1)
+    print("\n✅ Todas as consultas quentes usam índices")
+
+
+if __name__ == "__main__":
+    main()
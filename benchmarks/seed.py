@@ -0,0 +1,128 @@
+"""
+Popula um banco local com dados realistas para os benchmarks.
+
+Os volumes padrão imitam alguns meses de um bar movimentado: centenas de
+mesas, milhares de clientes e dezenas de milhares de pedidos/itens. O
+gerador aleatório tem semente fixa, então a mesma escala produz sempre o
+mesmo banco.
+
+Uso:
+    python -m benchmarks.seed --url sqlite:///bench.db --escala 1
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import insert
+
+VOLUMES_PADRAO = {
+    "mesas": 300,
+    "clientes": 3000,
+    "produtos": 80,
+    "pedidos": 30000,
+}
+TAMANHO_LOTE = 5000
+
+
+def _inserir(conn, tabela, linhas: list[dict]) -> None:
+    for inicio in range(0, len(linhas), TAMANHO_LOTE):
+        conn.execute(insert(tabela), linhas[inicio:inicio + TAMANHO_LOTE])
+
+
+def semear(url: str, escala: float = 1.0, semente: int = 42) -> dict:
+    """Cria o schema e insere os dados; retorna a contagem por tabela"""
+    os.environ["DATABASE_URL"] = url
+    from app import config, crud, database, models
+    from app.qrcodes import gerar_lote_base64, qrcode_hash
+
+    aleatorio = random.Random(semente)
+    volumes = {nome: max(1, int(qtd * escala)) for nome, qtd in VOLUMES_PADRAO.items()}
+
+    models.Base.metadata.create_all(bind=database.engine)
+
+    identificadores = [f"MESA-{i}" for i in range(1, volumes["mesas"] + 1)]
+    qrcodes = gerar_lote_base64(identificadores)
+    mesas = [
+        {"id": i, "identificador": identificador, "qrcode": qr, "qrcode_hash": qrcode_hash(qr)}
+        for i, (identificador, qr) in enumerate(zip(identificadores, qrcodes), start=1)
+    ]
+
+    produtos = [
+        {"id": i, "nome": f"Produto {i}", "preco": Decimal(aleatorio.randint(500, 9000)) / 100}
+        for i in range(1, volumes["produtos"] + 1)
+    ]
+    precos = {p["id"]: p["preco"] for p in produtos}
+
+    inicio_periodo = datetime.utcnow() - timedelta(days=90)
+    clientes = [
+        {
+            "id": i,
+            "mesa_id": aleatorio.randint(1, volumes["mesas"]),
+            "created_at": inicio_periodo + timedelta(minutes=aleatorio.randint(0, 90 * 24 * 60)),
+        }
+        for i in range(1, volumes["clientes"] + 1)
+    ]
+
+    pedidos = []
+    itens = []
+    for i in range(1, volumes["pedidos"] + 1):
+        pedidos.append({
+            "id": i,
+            "cliente_id": aleatorio.randint(1, volumes["clientes"]),
+            "status": aleatorio.choices(models.StatusPedidoEnum, weights=(20, 70, 10))[0],
+            "forma_pagamento": aleatorio.choice(models.FormaPagamentoEnum),
+            # Ordem de id acompanha created_at, como na produção
+            "created_at": inicio_periodo + timedelta(seconds=i * 90 * 24 * 3600 // volumes["pedidos"]),
+            "versao": 1,
+            "valor_total": 0,
+        })
+        for produto_id in aleatorio.sample(range(1, volumes["produtos"] + 1), aleatorio.randint(1, min(4, volumes["produtos"]))):
+            itens.append({
+                "pedido_id": i,
+                "produto_id": produto_id,
+                "quantidade": aleatorio.randint(1, 3),
+                "valor_unitario": precos[produto_id],
+            })
+            pedidos[-1]["valor_total"] += itens[-1]["valor_unitario"] * itens[-1]["quantidade"]
+
+    with database.engine.begin() as conn:
+        _inserir(conn, models.Mesa.__table__, mesas)
+        _inserir(conn, models.Produto.__table__, produtos)
+        _inserir(conn, models.Cliente.__table__, clientes)
+        _inserir(conn, models.Pedido.__table__, pedidos)
+        _inserir(conn, models.PedidoItem.__table__, itens)
+        conn.execute(insert(models.CatalogoVersao.__table__), [{"id": 1, "versao": 1}])
+
+    if config.TOTAIS_MATERIALIZADOS:
+        db = database.SessionLocal()
+        try:
+            crud.reconstruir_totais_clientes(db)
+        finally:
+            db.close()
+
+    return {
+        "mesas": len(mesas),
+        "clientes": len(clientes),
+        "produtos": len(produtos),
+        "pedidos": len(pedidos),
+        "pedido_itens": len(itens),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench.db")
+    parser.add_argument("--escala", type=float, default=1.0)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    contagens = semear(args.url, args.escala, args.semente)
+    print(f"✅ Banco semeado em {time.perf_counter() - inicio:.1f}s: {contagens}")
+
+
+if __name__ == "__main__":
+    main()